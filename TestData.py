@@ -1,101 +1,267 @@
 from neo4j import GraphDatabase
-import random
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.error import URLError
+from urllib.request import urlopen
 import string
 import networkx as nx
+import numpy as np
 from tqdm import tqdm
 
+from app.api_index import ApiIndex
+from app.db import BUMP_VERSION_QUERY, EXPORT_EDGES_QUERY, EXPORT_NODES_QUERY
+from app.graph_index import GraphIndex
+from app.schema import apply_schema_sync, verify_plans_sync
+from app.snapshot import write_snapshot
+from app.stats import GraphStats
+
 # Neo4j connection configuration
 URI = "bolt://localhost:7687"
 AUTH = ("neo4j", "password")  # Replace with your password
 
+NODE_COLUMNS = ('applicationId', 'applicationName', 'capabilityName', 'apiName', 'apiEndpoint')
+
+# Parallel loader defaults
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+DELETE_BATCH_SIZE = 10000
+
+# API whose /api/stats reports the loaded graph
+DEFAULT_STATS_URL = "http://localhost:5000"
+
+# The (:GraphVersion) node survives, so a reloaded graph never repeats an earlier version
+DELETE_BATCH_QUERY = """
+    MATCH (n)
+    WHERE NOT n:GraphVersion
+    WITH n LIMIT $limit
+    DETACH DELETE n
+    RETURN count(*) AS deleted
+"""
+
+LOAD_NODES_QUERY = """
+    UNWIND $rows AS app
+    MERGE (a:Application {applicationId: app.applicationId})
+    SET
+        a.applicationName = app.applicationName,
+        a.capabilityName = app.capabilityName,
+        a.apiName = app.apiName,
+        a.apiEndpoint = app.apiEndpoint
+"""
+
+LOAD_EDGES_QUERY = """
+    UNWIND $rows AS rel
+    MATCH (b:Application {applicationId: rel.upstreamId})
+    MATCH (a:Application {applicationId: rel.downstreamId})
+    MERGE (b)-[:PROVIDES_TO]->(a)
+"""
+
+
+DEGREE_DISTRIBUTIONS = ('uniform', 'powerlaw')
+ID_ALPHABET = np.frombuffer((string.ascii_uppercase + string.digits).encode(), dtype=np.uint8)
+
+NAME_PREFIXES = ['App', 'Service', 'System', 'Platform', 'Tool', 'API', 'Gateway', 'Database', 'Analytics', 'Monitor']
+NAME_SUFFIXES = ['Manager', 'Handler', 'Controller', 'Service', 'Engine', 'Core', 'Portal', 'Hub', 'Center', 'Suite']
+NAME_DOMAINS = ['Payment', 'User', 'Order', 'Inventory', 'Shipping', 'Billing', 'Customer', 'Product', 'Account',
+                'Report', 'Finance', 'HR', 'Sales', 'Marketing', 'Support', 'Security', 'Data', 'Integration',
+                'Workflow', 'Document']
+
+
+def _random_codes(rng, count, length):
+    """Draw count random strings of ID_ALPHABET characters as a NumPy unicode array."""
+    codes = ID_ALPHABET[rng.integers(0, len(ID_ALPHABET), size=(count, length))]
+    return codes.view(f'S{length}').ravel().astype(f'U{length}')
+
+
+def _unique_ids(rng, count, length=8):
+    """Random application IDs, redrawing the (rare) collisions until all are unique."""
+    ids = _random_codes(rng, count, length)
+    while True:
+        _, first = np.unique(ids, return_index=True)
+        if len(first) == count:
+            return ids
+        duplicate = np.ones(count, dtype=bool)
+        duplicate[first] = False
+        ids[duplicate] = _random_codes(rng, int(duplicate.sum()), length)
+
+
+def _dedupe_edges(num_apps, src, dst):
+    """Drop self-loops and repeated (src, dst) pairs."""
+    keep = src != dst
+    keys = np.unique(src[keep].astype(np.int64) * num_apps + dst[keep])
+    return (keys // num_apps).astype(np.int32), (keys % num_apps).astype(np.int32)
+
+
+def generate_graph(num_apps=10000, min_connections=5, distribution='uniform', extra_edges_per_app=0.0,
+                   powerlaw_exponent=1.0, seed=None):
+    """Generate a synthetic supply-chain graph with NumPy, in bulk.
+
+    Every app gets at least min_connections upstream and downstream apps:
+    each of min_connections rounds links a random permutation of the apps
+    into cycles (one edge in and one out per app), and apps that lost edges
+    to deduplication are topped up. extra_edges_per_app * num_apps further
+    edges are drawn either uniformly or, for 'powerlaw', with one endpoint
+    drawn from Zipf-like weights so a few hub apps collect most of them.
+
+    Returns a dict of column arrays: applicationId, applicationName,
+    capabilityName, apiName, apiEndpoint, and the PROVIDES_TO edge arrays
+    upstream/downstream holding row indices.
+    """
+    if distribution not in DEGREE_DISTRIBUTIONS:
+        raise ValueError(f"distribution must be one of {', '.join(DEGREE_DISTRIBUTIONS)}")
+    if num_apps <= min_connections:
+        raise ValueError("num_apps must be larger than min_connections")
+    rng = np.random.default_rng(seed)
 
-def generate_random_id(length=8):
-    """Generate a random application ID."""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-
-
-def generate_random_name():
-    """Generate a random application name."""
-    prefixes = ['App', 'Service', 'System', 'Platform', 'Tool', 'API', 'Gateway', 'Database', 'Analytics', 'Monitor']
-    suffixes = ['Manager', 'Handler', 'Controller', 'Service', 'Engine', 'Core', 'Portal', 'Hub', 'Center', 'Suite']
-    domains = ['Payment', 'User', 'Order', 'Inventory', 'Shipping', 'Billing', 'Customer', 'Product', 'Account',
-               'Report',
-               'Finance', 'HR', 'Sales', 'Marketing', 'Support', 'Security', 'Data', 'Integration', 'Workflow',
-               'Document']
-
-    return f"{random.choice(domains)}{random.choice(prefixes)}{random.choice(suffixes)}"
-
-
-def create_interconnected_test_data(num_apps=10000, min_connections=5):
-    """Generate test data ensuring each app has minimum required connections."""
     print("Generating applications...")
-    applications = []
-    app_dict = {}  # For quick lookup
-
-    # Generate applications with additional fields
-    for _ in tqdm(range(num_apps)):
-        app = {
-            'applicationId': generate_random_id(),
-            'applicationName': generate_random_name(),
-            'capabilityName': f"Capability_{generate_random_id(4)}",
-            'apiName': f"API_{generate_random_id(4)}",
-            'apiEndpoint': f"/api/v1/{generate_random_id(6)}",
-            'upstream': set(),
-            'downstream': set()
-        }
-        applications.append(app)
-        app_dict[app['applicationId']] = app
-
-    print("\nCreating relationships...")
-    # Ensure minimum connections for each application
-    for app in tqdm(applications):
-        # Continue adding connections until minimums are met
-        while len(app['upstream']) < min_connections or len(app['downstream']) < min_connections:
-            other_app = random.choice(applications)
-
-            # Skip if same app or already connected
-            if (other_app['applicationId'] == app['applicationId'] or
-                    other_app['applicationId'] in app['upstream'] or
-                    other_app['applicationId'] in app['downstream']):
-                continue
-
-            # Decide direction based on which minimum isn't met
-            if len(app['upstream']) < min_connections:
-                # Add as upstream
-                app['upstream'].add(other_app['applicationId'])
-                other_app['downstream'].add(app['applicationId'])
-            else:
-                # Add as downstream
-                app['downstream'].add(other_app['applicationId'])
-                other_app['upstream'].add(app['applicationId'])
-
-    # Convert sets to lists for JSON serialization
-    print("\nFinalizing relationships...")
-    relationships = []
-    for app in tqdm(applications):
-        relationships.append({
-            'app': {
-                'applicationId': app['applicationId'],
-                'applicationName': app['applicationName']
-            },
-            'upstream': [
-                {'applicationId': up_id, 'applicationName': app_dict[up_id]['applicationName']}
-                for up_id in app['upstream']
-            ],
-            'downstream': [
-                {'applicationId': down_id, 'applicationName': app_dict[down_id]['applicationName']}
-                for down_id in app['downstream']
-            ]
-        })
-
-    return relationships
+    names = np.array([f"{domain}{prefix}{suffix}"
+                      for domain in NAME_DOMAINS for prefix in NAME_PREFIXES for suffix in NAME_SUFFIXES])
+    graph = {
+        'applicationId': _unique_ids(rng, num_apps),
+        'applicationName': names[rng.integers(0, len(names), size=num_apps)],
+        'capabilityName': np.char.add('Capability_', _random_codes(rng, num_apps, 4)),
+        'apiName': np.char.add('API_', _random_codes(rng, num_apps, 4)),
+        'apiEndpoint': np.char.add('/api/v1/', _random_codes(rng, num_apps, 6)),
+    }
+
+    print("Creating relationships...")
+    src_parts, dst_parts = [], []
+    for _ in range(min_connections):
+        perm = rng.permutation(num_apps).astype(np.int32)
+        src_parts.append(perm)
+        dst_parts.append(np.roll(perm, -int(rng.integers(1, num_apps))))
+
+    num_extra = int(extra_edges_per_app * num_apps)
+    if num_extra:
+        uniform_end = rng.integers(0, num_apps, size=num_extra, dtype=np.int32)
+        if distribution == 'powerlaw':
+            weights = 1.0 / np.arange(1, num_apps + 1) ** powerlaw_exponent
+            hubs = rng.permutation(num_apps)[rng.choice(num_apps, size=num_extra, p=weights / weights.sum())]
+            hub_end = hubs.astype(np.int32)
+        else:
+            hub_end = rng.integers(0, num_apps, size=num_extra, dtype=np.int32)
+        # Hubs both provide to and consume from many apps
+        hub_is_source = rng.random(num_extra) < 0.5
+        src_parts.append(np.where(hub_is_source, hub_end, uniform_end))
+        dst_parts.append(np.where(hub_is_source, uniform_end, hub_end))
+
+    src, dst = _dedupe_edges(num_apps, np.concatenate(src_parts), np.concatenate(dst_parts))
+    while True:
+        missing_out = np.clip(min_connections - np.bincount(src, minlength=num_apps), 0, None)
+        missing_in = np.clip(min_connections - np.bincount(dst, minlength=num_apps), 0, None)
+        if not missing_out.any() and not missing_in.any():
+            break
+        need_out = np.repeat(np.arange(num_apps, dtype=np.int32), missing_out)
+        need_in = np.repeat(np.arange(num_apps, dtype=np.int32), missing_in)
+        src = np.concatenate([src, need_out, rng.integers(0, num_apps, size=len(need_in), dtype=np.int32)])
+        dst = np.concatenate([dst, rng.integers(0, num_apps, size=len(need_out), dtype=np.int32), need_in])
+        src, dst = _dedupe_edges(num_apps, src, dst)
+
+    graph['upstream'] = src
+    graph['downstream'] = dst
+    print(f"Generated {num_apps:,} applications and {len(src):,} relationships")
+    return graph
+
+
+def write_graph_chunks(graph, out_dir, chunk_size=100000):
+    """Stream a generated graph to chunk files instead of building Python dicts for all of it.
+
+    Writes nodes-NNNNN.ndjson (one application per line), edges-NNNNN.csv
+    (upstreamId,downstreamId) and a manifest.json listing them.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    num_apps = len(graph['applicationId'])
+    num_edges = len(graph['upstream'])
+    manifest = {'applications': num_apps, 'relationships': num_edges, 'nodeFiles': [], 'edgeFiles': []}
+
+    print(f"Writing nodes to {out_dir}...")
+    for start in tqdm(range(0, num_apps, chunk_size)):
+        name = f"nodes-{start // chunk_size:05d}.ndjson"
+        columns = [graph[field][start:start + chunk_size].tolist() for field in NODE_COLUMNS]
+        with open(os.path.join(out_dir, name), 'w') as f:
+            for row in zip(*columns):
+                f.write(json.dumps(dict(zip(NODE_COLUMNS, row))) + '\n')
+        manifest['nodeFiles'].append(name)
+
+    print(f"Writing relationships to {out_dir}...")
+    ids = graph['applicationId']
+    for start in tqdm(range(0, num_edges, chunk_size)):
+        name = f"edges-{start // chunk_size:05d}.csv"
+        upstream = ids[graph['upstream'][start:start + chunk_size]].tolist()
+        downstream = ids[graph['downstream'][start:start + chunk_size]].tolist()
+        with open(os.path.join(out_dir, name), 'w') as f:
+            f.write('upstreamId,downstreamId\n')
+            f.writelines(f"{up},{down}\n" for up, down in zip(upstream, downstream))
+        manifest['edgeFiles'].append(name)
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(out_dir):
+    with open(os.path.join(out_dir, 'manifest.json')) as f:
+        return json.load(f)
+
+
+def manifest_fingerprint(out_dir):
+    """Hash of a chunk directory's manifest and the sizes of the files it lists."""
+    digest = hashlib.sha256()
+    with open(os.path.join(out_dir, 'manifest.json'), 'rb') as f:
+        digest.update(f.read())
+    manifest = read_manifest(out_dir)
+    for name in manifest['nodeFiles'] + manifest['edgeFiles']:
+        digest.update(f"{name}:{os.path.getsize(os.path.join(out_dir, name))}".encode())
+    return digest.hexdigest()
+
+
+def iter_node_chunks(out_dir):
+    """Yield the applications of each node chunk file written by write_graph_chunks as a list of dicts."""
+    for name in read_manifest(out_dir)['nodeFiles']:
+        with open(os.path.join(out_dir, name)) as f:
+            yield [json.loads(line) for line in f]
+
+
+def iter_edge_chunks(out_dir):
+    """Yield the relationships of each edge chunk file as a list of (upstreamId, downstreamId) tuples."""
+    for name in read_manifest(out_dir)['edgeFiles']:
+        with open(os.path.join(out_dir, name)) as f:
+            next(f)  # header
+            yield [tuple(line.rstrip('\n').split(',')) for line in f]
+
+
+def to_relationships(graph):
+    """Convert a generated graph into the per-app relationships list that insert_data expects."""
+    ids = graph['applicationId'].tolist()
+    names = graph['applicationName'].tolist()
+    columns = [graph[field].tolist() for field in NODE_COLUMNS]
+    upstream_of = [[] for _ in ids]
+    downstream_of = [[] for _ in ids]
+    for up, down in zip(graph['upstream'].tolist(), graph['downstream'].tolist()):
+        upstream_of[down].append({'applicationId': ids[up], 'applicationName': names[up]})
+        downstream_of[up].append({'applicationId': ids[down], 'applicationName': names[down]})
+    return [
+        {'app': dict(zip(NODE_COLUMNS, row)), 'upstream': upstream_of[i], 'downstream': downstream_of[i]}
+        for i, row in enumerate(zip(*columns))
+    ]
+
+
+def create_interconnected_test_data(num_apps=10000, min_connections=5, seed=None):
+    """Generate test data ensuring each app has minimum required connections."""
+    return to_relationships(generate_graph(num_apps, min_connections, seed=seed))
 
 
 def insert_data(driver, relationships):
     with driver.session() as session:
         # Clear existing data
-        print("Clearing existing data...")
-        session.run("MATCH (n) DETACH DELETE n")
+        clear_database(driver)
+        apply_schema_sync(session)
+        bump_version(driver)
 
         # Create applications and relationships in batches
         batch_size = 100
@@ -143,78 +309,339 @@ def insert_data(driver, relationships):
                 session.run(rels_query, {'rels': rels_data})
 
 
-def verify_connectivity(driver):
+def bump_version(driver):
+    """Bump the store version, so an API snapshot taken before this load is not used after it."""
     with driver.session() as session:
-        print("\nVerifying network connectivity...")
-
-        # Check basic statistics
-        stats = session.run("""
-            MATCH (n:Application)
-            OPTIONAL MATCH (n)-[r1:UPSTREAM]->()
-            OPTIONAL MATCH ()-[r2:UPSTREAM]->(n)
-            WITH n, 
-                 count(DISTINCT r1) as outDegree,
-                 count(DISTINCT r2) as inDegree
-            RETURN 
-                count(n) as nodeCount,
-                sum(outDegree) as relationshipCount,
-                avg(outDegree) as avgUpstream,
-                avg(inDegree) as avgDownstream,
-                min(outDegree) as minUpstream,
-                min(inDegree) as minDownstream,
-                max(outDegree) as maxUpstream,
-                max(inDegree) as maxDownstream
-        """).single()
+        session.execute_write(lambda tx: tx.run(BUMP_VERSION_QUERY).consume())
 
-        print(f"""
+
+def clear_database(driver, batch_size=DELETE_BATCH_SIZE):
+    """Delete every node except the store version, batch_size nodes per transaction to bound its memory."""
+    print("Clearing existing data...")
+    total = 0
+    with driver.session() as session:
+        while True:
+            deleted = session.execute_write(
+                lambda tx: tx.run(DELETE_BATCH_QUERY, limit=batch_size).single()['deleted'])
+            total += deleted
+            if deleted < batch_size:
+                break
+            print(f"  deleted {total:,} nodes...")
+    print(f"Deleted {total:,} nodes")
+    return total
+
+
+class Checkpoint:
+    """Completed batch numbers per load phase, persisted as JSON so an interrupted load can resume.
+
+    Batches are numbered in input order, so a resumed load must use the same
+    input and batch size. The file records the batch size and a description of
+    the input (the generation parameters or the --load manifest fingerprint),
+    and load() refuses a mismatch.
+    """
+
+    def __init__(self, path, batch_size, source=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.source = source
+        self.cleared = False
+        self.done = {'nodes': set(), 'edges': set()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, batch_size, source=None):
+        checkpoint = cls(path, batch_size, source)
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state['batchSize'] != batch_size:
+                raise ValueError(f"Checkpoint {path} was written with batch size {state['batchSize']}, "
+                                 f"not {batch_size}")
+            if state.get('source') != source:
+                raise ValueError(f"Checkpoint {path} was written for input {state.get('source')}, "
+                                 f"not {source}; delete it to start a new load")
+            checkpoint.cleared = state['cleared']
+            checkpoint.done = {phase: set(batches) for phase, batches in state['done'].items()}
+        return checkpoint
+
+    def is_done(self, phase, batch_no):
+        return batch_no in self.done[phase]
+
+    def mark_done(self, phase, batch_no):
+        with self._lock:
+            self.done[phase].add(batch_no)
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        state = {
+            'batchSize': self.batch_size,
+            'source': self.source,
+            'cleared': self.cleared,
+            'done': {phase: sorted(batches) for phase, batches in self.done.items()},
+        }
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+def _batches(rows, batch_size):
+    """Split an iterable of rows into numbered lists of at most batch_size rows."""
+    rows = iter(rows)
+    for batch_no in itertools.count():
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch_no, batch
+
+
+def _write_batch(driver, query, rows):
+    with driver.session() as session:
+        # execute_write retries transient failures such as lock deadlocks between workers
+        session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+
+
+def _load_phase(driver, phase, query, rows, batch_size, workers, checkpoint):
+    """Write rows in batches from a pool of worker sessions, skipping batches the checkpoint has."""
+    print(f"\nLoading {phase} in batches of {batch_size:,} with {workers} workers...")
+    started = time.perf_counter()
+    written = skipped = 0
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(unit=' rows') as progress:
+        def collect(futures):
+            nonlocal written
+            failure = None
+            for future in futures:
+                batch_no, count = pending.pop(future)
+                if future.exception() is not None:
+                    failure = failure or future.exception()
+                    continue
+                checkpoint.mark_done(phase, batch_no)
+                written += count
+                progress.update(count)
+            # Record every committed batch before giving up, so a rerun redoes only the failed ones
+            if failure is not None:
+                raise failure
+
+        for batch_no, batch in _batches(rows, batch_size):
+            if checkpoint.is_done(phase, batch_no):
+                skipped += len(batch)
+                continue
+            # Keep a bounded number of batches in flight instead of materializing the input
+            if len(pending) >= 2 * workers:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(completed)
+            pending[pool.submit(_write_batch, driver, query, batch)] = (batch_no, len(batch))
+        collect(list(pending))
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed else 0.0
+    print(f"Loaded {written:,} {phase} in {elapsed:.1f}s ({rate:,.0f} rows/s)"
+          + (f", skipped {skipped:,} already loaded" if skipped else ""))
+    return {'rows': written, 'skipped': skipped, 'seconds': round(elapsed, 3), 'rowsPerSecond': round(rate, 1)}
+
+
+def parallel_load(driver, nodes, edges, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                  checkpoint_path=None, clear=True, source=None):
+    """Load application rows, then {upstreamId, downstreamId} edge rows, with parallel worker sessions.
+
+    nodes and edges are iterables consumed lazily. With checkpoint_path, every
+    committed batch is recorded there and a rerun with the same input resumes
+    after the batches already loaded (without clearing the database again).
+    source describes that input and must match the checkpoint's.
+    Returns rows/sec per phase.
+    """
+    checkpoint = Checkpoint.load(checkpoint_path, batch_size, source)
+    if clear and not checkpoint.cleared:
+        clear_database(driver)
+        checkpoint.cleared = True
+        checkpoint.save()
+
+    # Constraints and indexes first, so every MERGE/MATCH on applicationId is an index seek
+    with driver.session() as session:
+        apply_schema_sync(session)
+        verify_plans_sync(session, {
+            'load_nodes': (LOAD_NODES_QUERY, {'rows': []}),
+            'load_edges': (LOAD_EDGES_QUERY, {'rows': []}),
+        })
+    bump_version(driver)
+
+    report = {
+        'nodes': _load_phase(driver, 'nodes', LOAD_NODES_QUERY, nodes, batch_size, workers, checkpoint),
+        'edges': _load_phase(driver, 'edges', LOAD_EDGES_QUERY, edges, batch_size, workers, checkpoint),
+    }
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return report
+
+
+def graph_rows(graph):
+    """Node and edge row iterators for parallel_load from a generate_graph() result."""
+    columns = [graph[field] for field in NODE_COLUMNS]
+    nodes = (dict(zip(NODE_COLUMNS, (str(column[i]) for column in columns))) for i in range(len(columns[0])))
+    ids = graph['applicationId']
+    edges = ({'upstreamId': str(ids[up]), 'downstreamId': str(ids[down])}
+             for up, down in zip(graph['upstream'].tolist(), graph['downstream'].tolist()))
+    return nodes, edges
+
+
+def chunk_rows(out_dir):
+    """Node and edge row iterators for parallel_load from write_graph_chunks() files."""
+    nodes = (node for chunk in iter_node_chunks(out_dir) for node in chunk)
+    edges = ({'upstreamId': up, 'downstreamId': down} for chunk in iter_edge_chunks(out_dir) for up, down in chunk)
+    return nodes, edges
+
+
+def write_graph_snapshot(nodes, edges, path):
+    """Build the API's in-process graph from node and edge rows and write it as a snapshot.
+
+    Each application's API becomes an entry of the API index, as the API's
+    migration does in Neo4j. The snapshot is stamped with version 0, the version
+    of a fresh change log, so an API started with GRAPH_SNAPSHOT_PATH=path serves
+    it directly.
+    """
+    started = time.perf_counter()
+    graph = GraphIndex.build(nodes, ((edge['upstreamId'], edge['downstreamId']) for edge in edges))
+    apis = ApiIndex()
+    for node in graph.iter_nodes():
+        if node['apiName']:
+            apis.upsert_api(node['applicationId'], node['apiName'], node['apiEndpoint'])
+    write_snapshot(graph, path, apis=apis)
+    print(f"Wrote {len(graph):,} applications, {len(apis):,} APIs and {graph.edge_count:,} relationships "
+          f"to {path} in {time.perf_counter() - started:.1f}s")
+
+
+def _stream(session, query):
+    for record in session.run(query):
+        yield record
+
+
+def graph_stats(driver):
+    """GraphStats from one streaming pass over the applications and their PROVIDES_TO relationships."""
+    with driver.session() as session:
+        nodes = (record.data() for record in _stream(session, EXPORT_NODES_QUERY))
+        edges = ((record['upstreamId'], record['downstreamId']) for record in _stream(session, EXPORT_EDGES_QUERY))
+        stats = GraphStats(GraphIndex.build(nodes, edges))
+    stats.rebuild()
+    return stats.summary()
+
+
+def verify_connectivity(driver, stats_url=DEFAULT_STATS_URL, scan=False, applications=None):
+    """Print network statistics from a running API's /api/stats, or from a full graph scan with scan.
+
+    applications is the number of applications the load wrote. An API whose
+    count differs was started before the load and serves an older graph, so
+    the statistics are computed with the scan instead.
+    """
+    print("\nVerifying network connectivity...")
+    if scan:
+        stats = graph_stats(driver)
+    else:
+        try:
+            with urlopen(f"{stats_url.rstrip('/')}/api/stats") as response:
+                stats = json.load(response)
+        except URLError as e:
+            print(f"Could not read statistics from {stats_url} ({e.reason}); start the API or pass --stats-scan")
+            return
+        if applications is not None and stats['applications'] != applications:
+            print(f"The API at {stats_url} reports {stats['applications']:,} applications but this load wrote "
+                  f"{applications:,}; it does not see the load, so scanning the graph instead")
+            stats = graph_stats(driver)
+
+    print(f"""
 Network Statistics:
 ------------------
-Total Applications: {stats['nodeCount']:,}
-Total Relationships: {stats['relationshipCount']:,}
-Average Upstream Connections: {stats['avgUpstream']:.2f}
-Average Downstream Connections: {stats['avgDownstream']:.2f}
-Minimum Upstream Connections: {stats['minUpstream']}
-Minimum Downstream Connections: {stats['minDownstream']}
-Maximum Upstream Connections: {stats['maxUpstream']}
-Maximum Downstream Connections: {stats['maxDownstream']}
-        """)
-
-        # Sample of highly connected nodes
-        print("\nMost connected applications:")
-        highly_connected = session.run("""
-            MATCH (n:Application)
-            OPTIONAL MATCH (n)-[out:UPSTREAM]->()
-            OPTIONAL MATCH ()-[in:UPSTREAM]->(n)
-            WITH n, count(DISTINCT out) as outDegree, count(DISTINCT in) as inDegree,
-                 count(DISTINCT out) + count(DISTINCT in) as totalConnections
-            ORDER BY totalConnections DESC
-            LIMIT 5
-            RETURN n.applicationName as name, 
-                   outDegree as upstream,
-                   inDegree as downstream,
-                   totalConnections
-        """)
-
-        for record in highly_connected:
-            print(f"""
-App: {record['name']}
+Total Applications: {stats['applications']:,}
+Total Relationships: {stats['relationships']:,}
+Average Upstream Connections: {stats['upstream']['avg']:.2f}
+Average Downstream Connections: {stats['downstream']['avg']:.2f}
+Minimum Upstream Connections: {stats['upstream']['min']}
+Minimum Downstream Connections: {stats['downstream']['min']}
+Maximum Upstream Connections: {stats['upstream']['max']}
+Maximum Downstream Connections: {stats['downstream']['max']}
+    """)
+
+    # Sample of highly connected nodes
+    print("\nMost connected applications:")
+    for record in stats['topConnected']:
+        print(f"""
+App: {record['applicationName']}
 - Upstream connections: {record['upstream']}
 - Downstream connections: {record['downstream']}
-- Total connections: {record['totalConnections']}""")
+- Total connections: {record['total']}""")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic supply-chain graph and load it into Neo4j.")
+    parser.add_argument('--apps', type=int, default=10000, help="number of applications")
+    parser.add_argument('--min-connections', type=int, default=5, help="minimum upstream and downstream apps per app")
+    parser.add_argument('--distribution', choices=DEGREE_DISTRIBUTIONS, default='uniform',
+                        help="how extra edges are spread: uniformly or onto power-law hubs")
+    parser.add_argument('--extra-edges', type=float, default=0.0, help="extra edges per app beyond the minimum")
+    parser.add_argument('--powerlaw-exponent', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=None, help="random seed for reproducible graphs")
+    parser.add_argument('--out', help="write chunk files to this directory instead of loading Neo4j")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="rows per chunk file")
+    parser.add_argument('--load', metavar='DIR', help="load chunk files written by --out instead of generating")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="rows per write transaction")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="parallel loader sessions")
+    parser.add_argument('--stats-url', default=DEFAULT_STATS_URL,
+                        help="read the final statistics from this running API, started after the load; "
+                             "an API that does not see the loaded applications falls back to --stats-scan")
+    parser.add_argument('--stats-scan', action='store_true',
+                        help="compute the final statistics with a full streaming pass over the graph instead")
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help="write a graph snapshot for GRAPH_SNAPSHOT_PATH instead of loading Neo4j")
+    parser.add_argument('--checkpoint',
+                        help="checkpoint file; rerun with the same --load, or generation arguments and --seed, to resume")
+    args = parser.parse_args()
+    if args.checkpoint and not args.load and args.seed is None:
+        parser.error("--checkpoint needs --seed when generating, so a resumed load regenerates the same graph")
+    return args
+
+
+def input_source(args):
+    """What a load reads, recorded in its checkpoint: the chunk manifest or the generation parameters."""
+    if args.load:
+        return {'manifest': manifest_fingerprint(args.load)}
+    return {'apps': args.apps, 'minConnections': args.min_connections, 'distribution': args.distribution,
+            'extraEdges': args.extra_edges, 'powerlawExponent': args.powerlaw_exponent, 'seed': args.seed}
 
 
 def main():
+    args = parse_args()
     try:
-        print("Starting test data generation...")
-        relationships = create_interconnected_test_data(num_apps=10000, min_connections=5)
+        if args.load:
+            nodes, edges = chunk_rows(args.load)
+        else:
+            print("Starting test data generation...")
+            graph = generate_graph(num_apps=args.apps, min_connections=args.min_connections,
+                                   distribution=args.distribution, extra_edges_per_app=args.extra_edges,
+                                   powerlaw_exponent=args.powerlaw_exponent, seed=args.seed)
+            if args.out:
+                write_graph_chunks(graph, args.out, args.chunk_size)
+                if not args.snapshot:
+                    print("\nData generation complete!")
+                    return
+            nodes, edges = graph_rows(graph)
+
+        if args.snapshot:
+            write_graph_snapshot(nodes, edges, args.snapshot)
+            return
 
         print("\nConnecting to Neo4j...")
         driver = GraphDatabase.driver(URI, auth=AUTH)
 
         print("Inserting data...")
-        insert_data(driver, relationships)
+        report = parallel_load(driver, nodes, edges, batch_size=args.batch_size, workers=args.workers,
+                               checkpoint_path=args.checkpoint, source=input_source(args))
 
-        verify_connectivity(driver)
+        # Batches a resumed load skipped were written by the interrupted run
+        applications = report['nodes']['rows'] + report['nodes']['skipped']
+        verify_connectivity(driver, args.stats_url, args.stats_scan, applications)
 
         print("\nData generation complete!")
 
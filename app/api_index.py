@@ -0,0 +1,96 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# apiId = applicationId + API_ID_SEPARATOR + apiName, the unique key of an Api node
+API_ID_SEPARATOR = ":"
+
+
+def api_id(app_id: str, api_name: str) -> str:
+    return app_id + API_ID_SEPARATOR + api_name
+
+
+class ApiIndex:
+    """In-process index of Api nodes, their owning applications and CONSUMES edges.
+
+    Keyed by apiId. CONSUMES edges are kept in both directions, so the APIs an
+    API reads from (upstream) and the APIs reading from it (downstream) are
+    each one dict lookup away.
+    """
+
+    def __init__(self):
+        self._apis: Dict[str, dict] = {}
+        self._by_app: Dict[str, List[str]] = {}
+        self._providers: Dict[str, List[str]] = {}
+        self._consumers: Dict[str, List[str]] = {}
+        self.edge_count = 0
+
+    @classmethod
+    def from_columns(cls, app_ids: List[str], api_names: List[str],
+                     endpoints: List[Optional[str]]) -> Tuple["ApiIndex", List[str]]:
+        """An index of distinct APIs given column-wise, e.g. from a snapshot; also returns their apiIds."""
+        index = cls()
+        keys = [app_id + API_ID_SEPARATOR + api_name for app_id, api_name in zip(app_ids, api_names)]
+        index._apis = {
+            key: {"apiId": key, "applicationId": app_id, "apiName": api_name, "apiEndpoint": endpoint}
+            for key, app_id, api_name, endpoint in zip(keys, app_ids, api_names, endpoints)
+        }
+        by_app = index._by_app
+        for key, app_id in zip(keys, app_ids):
+            row = by_app.get(app_id)
+            if row is None:
+                by_app[app_id] = [key]
+            else:
+                row.append(key)
+        return index, keys
+
+    def __len__(self) -> int:
+        return len(self._apis)
+
+    def upsert_api(self, app_id: str, api_name: str, endpoint: Optional[str] = None) -> str:
+        """Add an API of app_id, or SET its endpoint if given; returns the apiId."""
+        key = api_id(app_id, api_name)
+        api = self._apis.get(key)
+        if api is None:
+            api = self._apis[key] = {"apiId": key, "applicationId": app_id, "apiName": api_name, "apiEndpoint": None}
+            self._by_app.setdefault(app_id, []).append(key)
+        if endpoint is not None:
+            api["apiEndpoint"] = endpoint
+        return key
+
+    def add_consumes(self, consumer_id: str, provider_id: str) -> bool:
+        """MERGE consumer -[:CONSUMES]-> provider between known APIs; returns False if it already existed."""
+        providers = self._providers.setdefault(consumer_id, [])
+        if provider_id in providers:
+            return False
+        providers.append(provider_id)
+        self._consumers.setdefault(provider_id, []).append(consumer_id)
+        self.edge_count += 1
+        return True
+
+    def add_rows(self, apis: List[dict], consumes: List[Tuple[str, str]]):
+        """Fold in written API rows and (providerId, consumerId) edges; idempotent."""
+        for api in apis:
+            self.upsert_api(api["applicationId"], api["apiName"], api.get("apiEndpoint"))
+        for provider_id, consumer_id in consumes:
+            self.add_consumes(consumer_id, provider_id)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._apis.get(key)
+
+    def apis_of(self, app_id: str) -> List[dict]:
+        return [self._apis[key] for key in self._by_app.get(app_id, ())]
+
+    def providers(self, key: str) -> List[str]:
+        """APIs that key consumes."""
+        return self._providers.get(key, [])
+
+    def consumers(self, key: str) -> List[str]:
+        """APIs that consume key."""
+        return self._consumers.get(key, [])
+
+    def iter_apis(self) -> Iterator[dict]:
+        return iter(self._apis.values())
+
+    def iter_consumes(self) -> Iterator[Tuple[str, str]]:
+        for consumer_id, providers in self._providers.items():
+            for provider_id in providers:
+                yield provider_id, consumer_id
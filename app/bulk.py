@@ -0,0 +1,99 @@
+import json
+import time
+from typing import AsyncIterator, List, Tuple
+
+from pydantic import ValidationError
+
+from app.models import Application
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (line number, decoded value) for each non-blank line of an NDJSON byte stream.
+
+    Lines that are not valid JSON are yielded as the json.JSONDecodeError.
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, _decode(line)
+    if buffer.strip():
+        yield line_no + 1, _decode(buffer)
+
+
+def _decode(line: bytes):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return e
+
+
+class BulkIngest:
+    """Validates Application payloads and writes them to a store chunk by chunk."""
+
+    def __init__(self, store, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.received = 0
+        self.created = 0
+        self.relationships = 0
+        self.chunks = 0
+        self.errors: List[dict] = []
+        self._pending: List[Tuple[int, Application]] = []
+        self._started = time.perf_counter()
+
+    async def add(self, position: int, raw):
+        """Queue one payload; position identifies it in error reports."""
+        self.received += 1
+        if isinstance(raw, Exception):
+            self._error(position, None, f"Invalid JSON: {raw}")
+            return
+        try:
+            application = Application(**raw)
+        except (TypeError, ValidationError) as e:
+            app_id = raw.get("applicationId") if isinstance(raw, dict) else None
+            self._error(position, app_id, str(e))
+            return
+
+        self._pending.append((position, application))
+        if len(self._pending) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self.chunks += 1
+        failed = dict(await self.store.create_applications([app for _, app in batch], self.chunk_size))
+        for i, (position, application) in enumerate(batch):
+            if i in failed:
+                self._error(position, application.applicationId, failed[i])
+            else:
+                self.created += 1
+                self.relationships += len(application.upstreamApps) + len(application.downstreamApps)
+
+    async def report(self) -> dict:
+        await self.flush()
+        elapsed = time.perf_counter() - self._started
+        return {
+            "received": self.received,
+            "created": self.created,
+            "failed": len(self.errors),
+            "relationships": self.relationships,
+            "chunks": self.chunks,
+            "chunkSize": self.chunk_size,
+            "elapsedSeconds": round(elapsed, 3),
+            "applicationsPerSecond": round(self.created / elapsed, 1) if elapsed else None,
+            "errors": self.errors,
+        }
+
+    def _error(self, position: int, app_id, message: str):
+        self.errors.append({"index": position, "applicationId": app_id, "error": message})
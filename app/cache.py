@@ -0,0 +1,132 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Set
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 60.0
+
+
+class CacheEntry:
+    __slots__ = ("payload", "etag", "expires", "node_ids")
+
+    def __init__(self, payload, etag: str, expires: float, node_ids: Set[str]):
+        self.payload = payload
+        self.etag = etag
+        self.expires = expires
+        self.node_ids = node_ids
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def compute_etag(payload) -> str:
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ResponseCache:
+    """Bounded LRU cache with a TTL for read payloads.
+
+    Each entry records the application ids its payload contains, so a write
+    that touches any of those nodes drops the entry through invalidate().
+    generation changes on every invalidation; readers capture it before
+    querying and pass it to put() so results computed before a write are not
+    cached after it.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._by_node: Dict[str, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, payload, node_ids: Iterable[str],
+            generation: Optional[int] = None) -> CacheEntry:
+        """Store payload under key and return its entry (with ETag).
+
+        Nothing is stored when caching is disabled or when generation is given
+        and an invalidation happened since it was read.
+        """
+        entry = CacheEntry(payload, compute_etag(payload), time.monotonic() + self.ttl, set(node_ids))
+        if self.max_entries <= 0 or (generation is not None and generation != self.generation):
+            return entry
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        for node_id in entry.node_ids:
+            self._by_node.setdefault(node_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, node_ids: Iterable[str]):
+        """Drop every entry whose payload includes one of node_ids."""
+        self.generation += 1
+        for node_id in node_ids:
+            for key in list(self._by_node.get(node_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_node.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for node_id in entry.node_ids:
+            keys = self._by_node.get(node_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_node[node_id]
@@ -0,0 +1,205 @@
+import asyncio
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+CHANGELOG_MAX_ENTRIES = 100000
+CHANGES_PAGE_SIZE = 1000
+CHANGES_MAX_PAGE_SIZE = 10000
+# Longest a long-poll request may wait for new changes
+MAX_WAIT_SECONDS = 30.0
+# How often a waiting reader checks the file for changes other processes appended
+SHARED_POLL_SECONDS = 1.0
+
+
+class ChangeLog:
+    """Append-only log of node, edge, API and CONSUMES upserts under a monotonically increasing graph version.
+
+    Every mutation gets the next version. Clients keep the last version they
+    applied and ask for the changes after it, so staying current costs in
+    proportion to the change rate rather than the graph size. The newest
+    max_entries changes are kept in memory; with a path they are also appended
+    to a JSON-lines file, and the version and tail survive restarts. The file
+    is rewritten to the retained changes whenever the memory is trimmed, so it
+    stays within the same bound.
+
+    Several processes (e.g. uvicorn workers) may share the file. Appends and
+    compactions hold an exclusive flock on a sidecar lock file and first read
+    what the others appended, so versions stay unique and a compaction keeps
+    every process's changes.
+    """
+
+    def __init__(self, max_entries: int = CHANGELOG_MAX_ENTRIES, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.version = 0
+        self._entries: List[dict] = []
+        self._file = None
+        self._lock_file = None
+        # Changes in the file, retained or not, and the bytes of it already read
+        self._file_entries = 0
+        self._offset = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def oldest(self) -> int:
+        """Oldest version still retained (version + 1 when the log is empty)."""
+        return self._entries[0]["version"] if self._entries else self.version + 1
+
+    def open(self):
+        """Replay the persisted log, if any, and open it for appending."""
+        if not self.path:
+            return
+        self._lock_file = open(f"{self.path}.lock", "a")
+        with self._locked():
+            self._file = open(self.path, "a")
+            self._read_tail()
+            if self._file_entries > len(self._entries):
+                self._compact()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def refresh(self) -> bool:
+        """Pick up the changes other processes appended to the shared file; True if there were any."""
+        if self._file is None:
+            return False
+        version = self.version
+        with self._locked():
+            self._read_tail()
+        if self.version == version:
+            return False
+        self._wake()
+        return True
+
+    def record(self, nodes: List[dict], edges: List[Tuple[str, str]]):
+        """Write listener: log the written nodes, then the edges."""
+        changes = [dict(node, op="node") for node in nodes]
+        changes += [{"op": "edge", "upstreamId": up, "downstreamId": down} for up, down in edges]
+        self._record(changes)
+
+    def record_apis(self, apis: List[dict], consumes: List[Tuple[str, str]]):
+        """API write listener: log the written APIs, then the CONSUMES edges."""
+        changes = [dict(api, op="api") for api in apis]
+        changes += [{"op": "consumes", "providerId": provider, "consumerId": consumer}
+                    for provider, consumer in consumes]
+        self._record(changes)
+
+    def _record(self, changes: List[dict]):
+        if not changes:
+            return
+        if self._file is None:
+            self._number(changes)
+        else:
+            with self._locked():
+                # Number after the changes other processes wrote
+                self._read_tail()
+                self._number(changes)
+                self._file.writelines(json.dumps(change) + "\n" for change in changes)
+                self._file.flush()
+                self._offset = os.fstat(self._file.fileno()).st_size
+                self._file_entries += len(changes)
+                if self._file_entries > len(self._entries):
+                    self._compact()
+        self._wake()
+
+    def _number(self, changes: List[dict]):
+        for change in changes:
+            change["version"] = self.version + 1
+            self._append(change)
+
+    def _wake(self):
+        # Wake every waiting reader, then arm a fresh event for the next write
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _read_tail(self):
+        """Read what was appended to the file since the last read, by any process; needs the lock."""
+        if os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino:
+            # Another process compacted the file; read the new one from the start
+            self._file.close()
+            self._file = open(self.path, "a")
+            self._offset = self._file_entries = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        self._offset += len(data)
+        for line in data.splitlines():
+            if line.strip():
+                self._file_entries += 1
+                change = json.loads(line)
+                if change["version"] > self.version:
+                    self._append(change)
+
+    def _compact(self):
+        """Rewrite the file to the retained changes, atomically; needs the lock."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(json.dumps(change) + "\n" for change in self._entries)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a")
+        self._file_entries = len(self._entries)
+        self._offset = os.fstat(self._file.fileno()).st_size
+
+    def _append(self, change: dict):
+        self.version = change["version"]
+        self._entries.append(change)
+        # Trim in batches so appends stay amortized O(1)
+        if len(self._entries) > self.max_entries * 1.25:
+            del self._entries[:len(self._entries) - self.max_entries]
+
+    def available(self, since: int) -> bool:
+        """False if changes after since were already dropped, or since is ahead of this log."""
+        return self.oldest - 1 <= since <= self.version
+
+    def changes_since(self, since: int, limit: int = CHANGES_PAGE_SIZE) -> List[dict]:
+        """Up to limit changes with a version greater than since; since must be available()."""
+        start = since + 1 - self.oldest
+        return self._entries[start:start + limit]
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Wait until the version moves past since; False on timeout.
+
+        Writes by other processes sharing the file set no event here, so with
+        a file the wait also checks it every SHARED_POLL_SECONDS.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.version <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            changed = self._changed
+            try:
+                await asyncio.wait_for(
+                    changed.wait(), remaining if self._file is None else min(remaining, SHARED_POLL_SECONDS))
+            except asyncio.TimeoutError:
+                self.refresh()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "oldestVersion": self.oldest,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "persistent": self.path is not None,
+        }
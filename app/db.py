@@ -0,0 +1,961 @@
+import asyncio
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from neo4j import AsyncGraphDatabase
+
+from app.api_index import API_ID_SEPARATOR, ApiIndex, api_id
+from app.bulk import DEFAULT_CHUNK_SIZE
+from app.graph_index import GraphIndex, move_name
+from app.metrics import POOL_WAIT_SECONDS, observe_query
+from app.schema import apply_schema, verify_plans
+from app.snapshot import Snapshot
+from app.models import Application
+from app.paths import DEFAULT_MAX_LENGTH, find_paths
+from app.traversal import DEFAULT_MAX_EDGES, DEFAULT_MAX_NODES, frontier_bfs, multi_root_bfs
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_QUERY = """
+    MATCH (a:Application {applicationId: $appId})
+    RETURN a.applicationId AS applicationId,
+           a.applicationName AS applicationName,
+           a.capabilityName AS capabilityName,
+           a.apiName AS apiName,
+           a.apiEndpoint AS apiEndpoint
+"""
+
+APPLICATIONS_QUERY = """
+    UNWIND $appIds AS appId
+    MATCH (a:Application {applicationId: appId})
+    RETURN a.applicationId AS applicationId,
+           a.applicationName AS applicationName,
+           a.capabilityName AS capabilityName,
+           a.apiName AS apiName,
+           a.apiEndpoint AS apiEndpoint
+"""
+
+# One hop of the supply-chain BFS for a whole frontier, both directions at once
+EXPAND_QUERY = """
+    UNWIND $upstreamIds AS id
+    MATCH (n:Application)-[:PROVIDES_TO]->(:Application {applicationId: id})
+    RETURN 'upstream' AS direction, n.applicationId AS source, id AS target,
+           n.applicationId AS applicationId, n.applicationName AS applicationName
+    LIMIT $limit
+    UNION ALL
+    UNWIND $downstreamIds AS id
+    MATCH (:Application {applicationId: id})-[:PROVIDES_TO]->(n:Application)
+    RETURN 'downstream' AS direction, id AS source, n.applicationId AS target,
+           n.applicationId AS applicationId, n.applicationName AS applicationName
+    LIMIT $limit
+"""
+
+# Keyset page of applications ordered by (applicationName, applicationId); the
+# STARTS WITH prefix filter and the ordering are served by the applicationName index.
+# The >= conjunct is a seekable range, so a page starts at the cursor instead of
+# re-reading every earlier row; the OR only settles ties on the cursor's name.
+# Prefix matching is case-sensitive, like the index.
+APPLICATIONS_PAGE_QUERY = """
+    MATCH (a:Application)
+    WHERE a.applicationName STARTS WITH $prefix
+      AND a.applicationName <> ''
+      AND a.applicationName >= $afterName
+      AND (a.applicationName > $afterName
+           OR (a.applicationName = $afterName AND a.applicationId > $afterId))
+    RETURN a.applicationId AS applicationId, a.applicationName AS applicationName
+    ORDER BY applicationName, applicationId
+    LIMIT $limit
+"""
+
+APPLICATION_APIS_QUERY = """
+    MATCH (:Application {applicationId: $appId})-[:EXPOSES]->(api:Api)
+    RETURN api.apiName AS apiName, api.apiEndpoint AS apiEndpoint
+    ORDER BY apiName
+"""
+
+API_QUERY = """
+    MATCH (a:Application)-[:EXPOSES]->(api:Api {apiId: $apiId})
+    RETURN api.apiId AS apiId, a.applicationId AS applicationId, a.applicationName AS applicationName,
+           api.apiName AS apiName, api.apiEndpoint AS apiEndpoint
+"""
+
+# One hop of API lineage for a whole frontier: upstream follows CONSUMES to the
+# APIs read from, downstream follows it back to the APIs reading; data flows
+# from source to target as with PROVIDES_TO
+API_EXPAND_QUERY = """
+    UNWIND $upstreamIds AS id
+    MATCH (:Api {apiId: id})-[:CONSUMES]->(n:Api)<-[:EXPOSES]-(a:Application)
+    RETURN 'upstream' AS direction, n.apiId AS source, id AS target,
+           n.apiId AS apiId, a.applicationId AS applicationId, a.applicationName AS applicationName,
+           n.apiName AS apiName, n.apiEndpoint AS apiEndpoint
+    LIMIT $limit
+    UNION ALL
+    UNWIND $downstreamIds AS id
+    MATCH (:Api {apiId: id})<-[:CONSUMES]-(n:Api)<-[:EXPOSES]-(a:Application)
+    RETURN 'downstream' AS direction, id AS source, n.apiId AS target,
+           n.apiId AS apiId, a.applicationId AS applicationId, a.applicationName AS applicationName,
+           n.apiName AS apiName, n.apiEndpoint AS apiEndpoint
+    LIMIT $limit
+"""
+
+# Store-side version of the graph, bumped by every write (the API's and the loader's) so
+# that a snapshot can tell whether anyone wrote since it was taken. The first SET takes
+# the node's write lock before the version is read, so concurrent bumps are not lost
+BUMP_VERSION_QUERY = """
+    MERGE (v:GraphVersion {name: 'graph'})
+    SET v._lock = true
+    SET v.version = coalesce(v.version, 0) + 1
+    REMOVE v._lock
+"""
+
+STORE_VERSION_QUERY = """
+    OPTIONAL MATCH (v:GraphVersion {name: 'graph'})
+    RETURN coalesce(v.version, 0) AS version
+"""
+
+# One-off data migrations already applied are recorded as (:Migration {name}) nodes
+MIGRATION_APPLIED_QUERY = """
+    MATCH (m:Migration {name: $name})
+    RETURN count(m) AS applied
+"""
+
+MIGRATION_DONE_QUERY = """
+    MERGE (m:Migration {name: $name})
+    SET m.appliedAt = datetime()
+"""
+
+# Api nodes for applications stored before APIs were nodes of their own; idempotent
+MIGRATE_APIS_QUERY = """
+    MATCH (a:Application)
+    WHERE a.apiName IS NOT NULL AND a.apiName <> ''
+      AND NOT (a)-[:EXPOSES]->(:Api {apiName: a.apiName})
+    CALL {
+        WITH a
+        MERGE (api:Api {apiId: a.applicationId + $separator + a.apiName})
+        SET api.applicationId = a.applicationId,
+            api.apiName = a.apiName,
+            api.apiEndpoint = a.apiEndpoint
+        MERGE (a)-[:EXPOSES]->(api)
+    } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+EXPORT_NODES_QUERY = """
+    MATCH (a:Application)
+    RETURN a.applicationId AS applicationId,
+           a.applicationName AS applicationName,
+           a.capabilityName AS capabilityName,
+           a.apiName AS apiName,
+           a.apiEndpoint AS apiEndpoint
+"""
+
+EXPORT_EDGES_QUERY = """
+    MATCH (u:Application)-[:PROVIDES_TO]->(d:Application)
+    RETURN u.applicationId AS upstreamId, d.applicationId AS downstreamId
+"""
+
+EXPORT_APIS_QUERY = """
+    MATCH (a:Application)-[:EXPOSES]->(api:Api)
+    RETURN a.applicationId AS applicationId, api.apiName AS apiName, api.apiEndpoint AS apiEndpoint
+"""
+
+EXPORT_CONSUMES_QUERY = """
+    MATCH (c:Api)-[:CONSUMES]->(p:Api)
+    RETURN p.apiId AS providerId, c.apiId AS consumerId
+"""
+
+# Single writes (create_application). Both endpoints of a relationship are bound in
+# their own clauses: MERGE on a pattern with an unbound node creates the whole pattern,
+# including a second Application with the same applicationId
+CREATE_APPLICATION_QUERY = """
+    MERGE (a:Application {applicationId: $appId})
+    SET a.applicationName = $appName,
+        a.capabilityName = $capName,
+        a.apiName = $apiName,
+        a.apiEndpoint = $apiEndpoint
+"""
+
+CREATE_UPSTREAM_QUERY = """
+    MATCH (a:Application {applicationId: $mainAppId})
+    MERGE (u:Application {applicationId: $upstreamId})
+    SET u.applicationName = $upstreamName
+    MERGE (u)-[:PROVIDES_TO]->(a)
+"""
+
+CREATE_DOWNSTREAM_QUERY = """
+    MATCH (a:Application {applicationId: $mainAppId})
+    MERGE (d:Application {applicationId: $downstreamId})
+    SET d.applicationName = $downstreamName
+    MERGE (a)-[:PROVIDES_TO]->(d)
+"""
+
+# Bulk writes: neighbors first so that full application records win the SET
+BULK_NEIGHBORS_QUERY = """
+    UNWIND $neighbors AS n
+    MERGE (a:Application {applicationId: n.applicationId})
+    SET a.applicationName = n.applicationName
+"""
+
+BULK_APPS_QUERY = """
+    UNWIND $apps AS app
+    MERGE (a:Application {applicationId: app.applicationId})
+    SET a.applicationName = app.applicationName,
+        a.capabilityName = app.capabilityName,
+        a.apiName = app.apiName,
+        a.apiEndpoint = app.apiEndpoint
+"""
+
+BULK_RELS_QUERY = """
+    UNWIND $rels AS rel
+    MATCH (u:Application {applicationId: rel.upstreamId})
+    MATCH (d:Application {applicationId: rel.downstreamId})
+    MERGE (u)-[:PROVIDES_TO]->(d)
+"""
+
+# APIs after their applications; consumed APIs of unknown applications are created as stubs
+BULK_APIS_QUERY = """
+    UNWIND $apis AS row
+    MATCH (a:Application {applicationId: row.applicationId})
+    MERGE (api:Api {apiId: row.apiId})
+    SET api.applicationId = row.applicationId,
+        api.apiName = row.apiName,
+        api.apiEndpoint = row.apiEndpoint
+    MERGE (a)-[:EXPOSES]->(api)
+"""
+
+BULK_CONSUMES_QUERY = """
+    UNWIND $consumes AS rel
+    MATCH (consumer:Api {apiId: rel.consumerId})
+    MERGE (provider:Api {apiId: rel.providerId})
+    ON CREATE SET provider.applicationId = rel.providerAppId, provider.apiName = rel.providerApiName
+    MERGE (owner:Application {applicationId: rel.providerAppId})
+    MERGE (owner)-[:EXPOSES]->(provider)
+    MERGE (consumer)-[:CONSUMES]->(provider)
+"""
+
+# Hot queries that must be served by index seeks, with example parameters for EXPLAIN
+HOT_QUERY_PLANS = {
+    "application": (APPLICATION_QUERY, {"appId": ""}),
+    "applications": (APPLICATIONS_QUERY, {"appIds": [""]}),
+    "expand": (EXPAND_QUERY, {"upstreamIds": [""], "downstreamIds": [""], "limit": 1}),
+    "applications_page": (APPLICATIONS_PAGE_QUERY,
+                          {"prefix": "a", "afterName": "", "afterId": "", "limit": 1}),
+    "application_apis": (APPLICATION_APIS_QUERY, {"appId": ""}),
+    "api": (API_QUERY, {"apiId": ""}),
+    "api_expand": (API_EXPAND_QUERY, {"upstreamIds": [""], "downstreamIds": [""], "limit": 1}),
+    "create_application": (CREATE_APPLICATION_QUERY,
+                           {"appId": "", "appName": "", "capName": "", "apiName": "", "apiEndpoint": ""}),
+    "create_upstream": (CREATE_UPSTREAM_QUERY, {"mainAppId": "", "upstreamId": "", "upstreamName": ""}),
+    "create_downstream": (CREATE_DOWNSTREAM_QUERY, {"mainAppId": "", "downstreamId": "", "downstreamName": ""}),
+    "bulk_neighbors": (BULK_NEIGHBORS_QUERY, {"neighbors": []}),
+    "bulk_apps": (BULK_APPS_QUERY, {"apps": []}),
+    "bulk_rels": (BULK_RELS_QUERY, {"rels": []}),
+    "bulk_apis": (BULK_APIS_QUERY, {"apis": []}),
+    "bulk_consumes": (BULK_CONSUMES_QUERY, {"consumes": []}),
+    "bump_version": (BUMP_VERSION_QUERY, {}),
+    "store_version": (STORE_VERSION_QUERY, {}),
+}
+
+# listener(nodes, edges): node property rows and (upstreamId, downstreamId) pairs
+WriteListener = Callable[[List[dict], List[Tuple[str, str]]], None]
+# listener(apis, consumes): Api property rows and (providerId, consumerId) CONSUMES pairs
+ApiWriteListener = Callable[[List[dict], List[Tuple[str, str]]], None]
+
+API_FIELDS = ("apiId", "applicationId", "applicationName", "apiName", "apiEndpoint")
+
+
+class GraphStore:
+    """Storage backend for the supply-chain API.
+
+    Read methods return the JSON-ready payloads served by app/main.py and None
+    when the requested application does not exist. After every successful write
+    the registered listeners are called with the node property rows and the
+    (upstreamId, downstreamId) edges that were written, then the API listeners
+    with the Api rows and CONSUMES edges.
+    """
+
+    # The store's version as load() found it; None for stores without one
+    store_version: Optional[int] = None
+
+    def __init__(self):
+        self._listeners: List[WriteListener] = []
+        self._api_listeners: List[ApiWriteListener] = []
+
+    def add_listener(self, listener: "WriteListener"):
+        self._listeners.append(listener)
+
+    def add_api_listener(self, listener: "ApiWriteListener"):
+        self._api_listeners.append(listener)
+
+    def _notify(self, apps: List[Application]):
+        if not apps or not (self._listeners or self._api_listeners):
+            return
+        app_rows, neighbor_rows, rel_rows = _bulk_rows(apps)
+        api_rows, consume_rows = _api_rows(apps)
+        # Applications owning a consumed API are touched too; the stub sets no properties
+        providers = [{"applicationId": rel["providerAppId"]} for rel in consume_rows]
+        nodes = neighbor_rows + providers + app_rows
+        edges = [(rel["upstreamId"], rel["downstreamId"]) for rel in rel_rows]
+        for listener in self._listeners:
+            listener(nodes, edges)
+        if not api_rows:
+            return
+        # Consumed APIs are stubs too, without an endpoint
+        stubs = [
+            {"apiId": rel["providerId"], "applicationId": rel["providerAppId"], "apiName": rel["providerApiName"]}
+            for rel in consume_rows
+        ]
+        consumes = [(rel["providerId"], rel["consumerId"]) for rel in consume_rows]
+        for listener in self._api_listeners:
+            listener(stubs + api_rows, consumes)
+
+    async def load(self, snapshot: Optional[Snapshot] = None):
+        """Prepare the backend for serving; called once at startup.
+
+        snapshot holds the current application graph and API index when the
+        caller restored them; backends holding an index use them instead of
+        reading every node, edge and API.
+        """
+
+    def reflects(self, snapshot: Snapshot) -> bool:
+        """Whether snapshot was taken of the store as load() found it; always so for stores without a version."""
+        return self.store_version is None or snapshot.store_version == self.store_version
+
+    async def snapshot_version(self) -> Optional[int]:
+        """The store version that the in-process graph written to a snapshot now reflects.
+
+        None if the store has no version, or other writers changed it since load().
+        """
+        return None
+
+    async def close(self):
+        """Release backend resources; called once at shutdown."""
+
+    async def create_application(self, app: Application):
+        raise NotImplementedError
+
+    async def create_applications(self, apps: List[Application],
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, str]]:
+        """Write many applications; returns (position, error) for each one that failed."""
+        # create_application notifies listeners for each item it writes
+        errors = []
+        for i, app in enumerate(apps):
+            try:
+                await self.create_application(app)
+            except Exception as e:
+                errors.append((i, str(e)))
+        return errors
+
+    async def list_applications(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                                prefix: str = "") -> List[dict]:
+        """Up to limit applications ordered by (applicationName, applicationId).
+
+        after is the (applicationName, applicationId) key of the last item of the
+        previous page; prefix restricts results to names starting with it.
+        Each applicationId appears at most once.
+        """
+        raise NotImplementedError
+
+    async def get_application(self, app_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def get_applications(self, app_ids: List[str]) -> Dict[str, dict]:
+        """The applications among app_ids that exist, by applicationId."""
+        found = {}
+        for app_id in app_ids:
+            app = await self.get_application(app_id)
+            if app is not None:
+                found[app_id] = app
+        return found
+
+    async def expand(self, upstream_ids: List[str], downstream_ids: List[str],
+                     limit: int) -> List[Tuple[str, str, str, dict]]:
+        """Return up to limit (direction, source, target, neighbor) edges for one BFS hop."""
+        raise NotImplementedError
+
+    async def get_supply_chain(self, app_id: str, depth: int = 1, direction: str = "both",
+                               max_nodes: int = DEFAULT_MAX_NODES,
+                               max_edges: int = DEFAULT_MAX_EDGES) -> Optional[dict]:
+        main_app = await self.get_application(app_id)
+        if main_app is None:
+            return None
+        result = await frontier_bfs(self.expand, app_id, depth, direction, max_nodes, max_edges)
+        return dict(mainApp=main_app, **result)
+
+    async def get_supply_chains(self, app_ids: List[str], depth: int = 1, direction: str = "both",
+                                max_nodes: int = DEFAULT_MAX_NODES, max_edges: int = DEFAULT_MAX_EDGES,
+                                membership: bool = False) -> Optional[dict]:
+        """Union of the supply chains of app_ids from one batched traversal; None if none of them exists.
+
+        Unknown ids are listed as missing. With membership, nodes list the
+        indexes into roots they are upstream (upstreamOf) or downstream
+        (downstreamOf) of.
+        """
+        requested = list(dict.fromkeys(app_ids))
+        found = await self.get_applications(requested)
+        roots = [app_id for app_id in requested if app_id in found]
+        if not roots:
+            return None
+        result = await multi_root_bfs(self.expand, roots, depth, direction, max_nodes, max_edges,
+                                      membership, found)
+        return dict(result, missing=[app_id for app_id in requested if app_id not in found])
+
+    async def find_paths(self, from_id: str, to_id: str, k: int = 1, max_length: int = DEFAULT_MAX_LENGTH,
+                         max_nodes: int = DEFAULT_MAX_NODES,
+                         max_edges: int = DEFAULT_MAX_EDGES) -> Optional[dict]:
+        """Up to k shortest PROVIDES_TO paths from from_id to to_id; None if either app is unknown."""
+        endpoints = {}
+        for app_id in (from_id, to_id):
+            app = await self.get_application(app_id)
+            if app is None:
+                return None
+            endpoints[app_id] = {"applicationId": app_id, "applicationName": app["applicationName"]}
+        result = await find_paths(self.expand, from_id, to_id, k, max_length, max_nodes, max_edges, endpoints)
+        return dict(fromApp=endpoints[from_id], toApp=endpoints[to_id], **result)
+
+    async def get_application_apis(self, app_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    async def get_api(self, key: str) -> Optional[dict]:
+        """The API with apiId key and its owning application, or None."""
+        raise NotImplementedError
+
+    async def expand_apis(self, upstream_ids: List[str], downstream_ids: List[str],
+                          limit: int) -> List[Tuple[str, str, str, dict]]:
+        """expand() over CONSUMES between apiIds: upstream are the APIs read from, downstream the readers."""
+        raise NotImplementedError
+
+    async def get_api_supply_chain(self, app_id: str, api_name: str, depth: int = 1,
+                                   max_nodes: int = DEFAULT_MAX_NODES,
+                                   max_edges: int = DEFAULT_MAX_EDGES) -> Optional[dict]:
+        """Lineage of one API: the APIs it consumes, transitively, and those consuming it."""
+        main_api = await self.get_api(api_id(app_id, api_name))
+        if main_api is None:
+            return None
+        result = await frontier_bfs(self.expand_apis, main_api["apiId"], depth, "both",
+                                    max_nodes, max_edges, key="apiId")
+        return dict(mainApp=main_api, **result)
+
+    def export_graph(self) -> Tuple[AsyncIterator[dict], AsyncIterator[Tuple[str, str]]]:
+        """Stream every node and every (upstreamId, downstreamId) PROVIDES_TO edge."""
+        raise NotImplementedError
+
+    def export_apis(self) -> Tuple[AsyncIterator[dict], AsyncIterator[Tuple[str, str]]]:
+        """Stream every API and every (providerId, consumerId) CONSUMES edge."""
+        raise NotImplementedError
+
+    async def api_index(self) -> ApiIndex:
+        """An ApiIndex of all APIs, built from export_apis()."""
+        apis, consumes = self.export_apis()
+        index = ApiIndex()
+        async for api in apis:
+            index.upsert_api(api["applicationId"], api["apiName"], api.get("apiEndpoint"))
+        async for provider_id, consumer_id in consumes:
+            index.add_consumes(consumer_id, provider_id)
+        return index
+
+    async def graph_index(self) -> GraphIndex:
+        """A GraphIndex of the whole graph for in-process analytics, built from export_graph()."""
+        nodes, edges = self.export_graph()
+        index = GraphIndex()
+        async for node in nodes:
+            index.upsert_node(node["applicationId"], node)
+        src = array("i")
+        dst = array("i")
+        async for upstream_id, downstream_id in edges:
+            src.append(index.upsert_node(upstream_id))
+            dst.append(index.upsert_node(downstream_id))
+        index.set_edges(src, dst)
+        return index
+
+
+class GraphDB(GraphStore):
+    """Neo4j-backed store; every call is a Bolt round trip."""
+
+    def __init__(self):
+        super().__init__()
+        # Connection settings; the driver itself is opened by load() at startup
+        self.uri = os.getenv("NEO4J_URI", "neo4j://localhost:7687")
+        self.auth = (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password"))
+        self.pool_config = {
+            "max_connection_pool_size": int(os.getenv("NEO4J_MAX_POOL_SIZE", "100")),
+            "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60")),
+            "max_connection_lifetime": float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+        }
+        # EXPLAIN the hot queries at startup and refuse to start if one scans
+        self.verify_plans = os.getenv("SCHEMA_VERIFY", "1") != "0"
+        self.driver = None
+        # Writes made through this store since load(), each of which bumped the store version once
+        self._writes = 0
+        # One slot per pooled connection, so waiting for a connection can be measured
+        self._pool_slots = asyncio.Semaphore(self.pool_config["max_connection_pool_size"])
+
+    async def load(self, snapshot: Optional[Snapshot] = None):
+        if self.driver is None:
+            self.driver = AsyncGraphDatabase.driver(self.uri, auth=self.auth, **self.pool_config)
+        async with self._session("schema") as session:
+            await apply_schema(session)
+            await _migrate(session, "apis", MIGRATE_APIS_QUERY, {"separator": API_ID_SEPARATOR})
+            if self.verify_plans:
+                await verify_plans(session, HOT_QUERY_PLANS)
+        self.store_version = await self._read_version()
+        self._writes = 0
+
+    async def _read_version(self) -> int:
+        records = await self._fetch("store_version", STORE_VERSION_QUERY)
+        return records[0]["version"]
+
+    async def snapshot_version(self) -> Optional[int]:
+        if self.store_version is None:
+            return None
+        try:
+            version = await self._read_version()
+        except Exception:
+            logger.exception("Could not read the store version")
+            return None
+        if version != self.store_version + self._writes:
+            logger.warning("The store is at version %d, not %d: other writers changed it since startup",
+                           version, self.store_version + self._writes)
+            return None
+        return version
+
+    async def close(self):
+        if self.driver is not None:
+            await self.driver.close()
+            self.driver = None
+
+    @asynccontextmanager
+    async def _session(self, query_name: str):
+        """A driver session holding one connection slot; the wait for the slot is recorded."""
+        started = time.perf_counter()
+        async with self._pool_slots:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started, query=query_name)
+            async with self.driver.session() as session:
+                yield session
+
+    async def _fetch(self, name: str, query: str, **params) -> list:
+        """Run a read query in its own session and return all of its records."""
+        async with self._session(name) as session:
+            with observe_query(name, params) as observed:
+                result = await session.run(query, params)
+                records = [record async for record in result]
+                observed.rows = len(records)
+        return records
+
+    async def create_application(self, app: Application):
+        row = _app_row(app)
+        async with self._session("create_application") as session:
+            # Bumped first: a write failing halfway leaves the version ahead of this store's count
+            await _execute(session, "bump_version", BUMP_VERSION_QUERY, {})
+
+            # Create main application node
+            await _execute(session, "create_application", CREATE_APPLICATION_QUERY, {
+                "appId": app.applicationId,
+                "appName": app.applicationName,
+                "capName": app.capabilityName,
+                "apiName": row["apiName"],
+                "apiEndpoint": row["apiEndpoint"],
+            })
+
+            # Create relationships for upstream apps
+            for upstream in app.upstreamApps:
+                if upstream.appId and upstream.appName:  # Only create if data exists
+                    await _execute(session, "create_upstream", CREATE_UPSTREAM_QUERY, {
+                        "upstreamId": upstream.appId,
+                        "upstreamName": upstream.appName,
+                        "mainAppId": app.applicationId,
+                    })
+
+            # Create relationships for downstream apps
+            for downstream in app.downstreamApps:
+                if downstream.appId and downstream.appName:  # Only create if data exists
+                    await _execute(session, "create_downstream", CREATE_DOWNSTREAM_QUERY, {
+                        "downstreamId": downstream.appId,
+                        "downstreamName": downstream.appName,
+                        "mainAppId": app.applicationId,
+                    })
+
+            await _write_apis(session, *_api_rows([app]))
+        self._writes += 1
+        self._notify([app])
+
+    async def create_applications(self, apps: List[Application],
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, str]]:
+        errors = []
+        async with self._session("bulk_write") as session:
+            for start in range(0, len(apps), chunk_size):
+                chunk = apps[start:start + chunk_size]
+                try:
+                    await session.execute_write(_write_applications, *_bulk_rows(chunk), *_api_rows(chunk))
+                except Exception as e:
+                    # The chunk's transaction was rolled back as a whole
+                    errors.extend((start + i, str(e)) for i in range(len(chunk)))
+                    continue
+                self._writes += 1
+                self._notify(chunk)
+        return errors
+
+    async def get_application(self, app_id: str) -> Optional[dict]:
+        records = await self._fetch("application", APPLICATION_QUERY, appId=app_id)
+        return records[0].data() if records else None
+
+    async def get_applications(self, app_ids: List[str]) -> Dict[str, dict]:
+        records = await self._fetch("applications", APPLICATIONS_QUERY, appIds=app_ids)
+        return {record["applicationId"]: record.data() for record in records}
+
+    async def expand(self, upstream_ids: List[str], downstream_ids: List[str],
+                     limit: int) -> List[Tuple[str, str, str, dict]]:
+        records = await self._fetch("expand", EXPAND_QUERY, upstreamIds=upstream_ids,
+                                    downstreamIds=downstream_ids, limit=limit)
+        return [
+            (record["direction"], record["source"], record["target"], {
+                "applicationId": record["applicationId"],
+                "applicationName": record["applicationName"]
+            })
+            for record in records
+        ][:limit]
+
+    async def list_applications(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                                prefix: str = "") -> List[dict]:
+        after_name, after_id = after or ("", "")
+        records = await self._fetch("applications_page", APPLICATIONS_PAGE_QUERY, prefix=prefix,
+                                    afterName=after_name, afterId=after_id, limit=limit)
+        applications = []
+        for record in records:
+            # Rows are ordered by id within a name, so duplicates are adjacent
+            if applications and applications[-1]["applicationId"] == record["applicationId"]:
+                continue
+            applications.append({
+                "applicationId": record["applicationId"],
+                "applicationName": record["applicationName"]
+            })
+        return applications
+
+    async def get_application_apis(self, app_id: str) -> List[dict]:
+        records = await self._fetch("application_apis", APPLICATION_APIS_QUERY, appId=app_id)
+        return [record.data() for record in records]
+
+    async def get_api(self, key: str) -> Optional[dict]:
+        records = await self._fetch("api", API_QUERY, apiId=key)
+        return records[0].data() if records else None
+
+    async def expand_apis(self, upstream_ids: List[str], downstream_ids: List[str],
+                          limit: int) -> List[Tuple[str, str, str, dict]]:
+        records = await self._fetch("api_expand", API_EXPAND_QUERY, upstreamIds=upstream_ids,
+                                    downstreamIds=downstream_ids, limit=limit)
+        return [
+            (record["direction"], record["source"], record["target"], {
+                field: record[field] for field in API_FIELDS
+            })
+            for record in records
+        ][:limit]
+
+    def export_graph(self) -> Tuple[AsyncIterator[dict], AsyncIterator[Tuple[str, str]]]:
+        return self._stream_nodes(), self._stream_edges()
+
+    def export_apis(self) -> Tuple[AsyncIterator[dict], AsyncIterator[Tuple[str, str]]]:
+        return self._stream("export_apis", EXPORT_APIS_QUERY), self._stream_consumes()
+
+    async def _stream(self, name: str, query: str) -> AsyncIterator[dict]:
+        async with self._session(name) as session:
+            with observe_query(name) as observed:
+                result = await session.run(query)
+                async for record in result:
+                    observed.rows += 1
+                    yield record.data()
+
+    def _stream_nodes(self) -> AsyncIterator[dict]:
+        return self._stream("export_nodes", EXPORT_NODES_QUERY)
+
+    async def _stream_consumes(self) -> AsyncIterator[Tuple[str, str]]:
+        async for row in self._stream("export_consumes", EXPORT_CONSUMES_QUERY):
+            yield row["providerId"], row["consumerId"]
+
+    async def _stream_edges(self) -> AsyncIterator[Tuple[str, str]]:
+        async with self._session("export_edges") as session:
+            with observe_query("export_edges") as observed:
+                result = await session.run(EXPORT_EDGES_QUERY)
+                async for record in result:
+                    observed.rows += 1
+                    yield record["upstreamId"], record["downstreamId"]
+
+
+class IndexedGraphDB(GraphStore):
+    """Serves reads from an in-process GraphIndex.
+
+    With a source store the index is loaded from it at startup and writes go to
+    the source first, then into the index. Without one it is a standalone
+    in-memory graph, e.g. for local development and tests without Neo4j.
+    """
+
+    def __init__(self, source: Optional[GraphStore] = None):
+        super().__init__()
+        self.source = source
+        self.index = GraphIndex()
+        self.apis = ApiIndex()
+        # Sorted (applicationName, applicationId) keys for paginated listing
+        self._by_name: List[Tuple[str, str]] = []
+
+    @property
+    def store_version(self) -> Optional[int]:
+        return None if self.source is None else self.source.store_version
+
+    async def load(self, snapshot: Optional[Snapshot] = None):
+        if self.source is not None:
+            await self.source.load()
+        if snapshot is not None and self.reflects(snapshot):
+            self.index = snapshot.graph
+            self.apis = snapshot.apis
+            self._by_name = snapshot.name_keys()
+            return
+        if self.source is not None:
+            self.index = await self.source.graph_index()
+            self.apis = await self.source.api_index()
+        self._by_name = sorted(
+            (name, self.index.app_id(node))
+            for node in range(len(self.index))
+            for name in [self.index.get(node, "applicationName")]
+            if name
+        )
+
+    async def snapshot_version(self) -> Optional[int]:
+        return None if self.source is None else await self.source.snapshot_version()
+
+    async def close(self):
+        if self.source is not None:
+            await self.source.close()
+
+    async def create_application(self, app: Application):
+        if self.source is not None:
+            await self.source.create_application(app)
+        self._apply(app)
+        self._notify([app])
+
+    async def create_applications(self, apps: List[Application],
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, str]]:
+        if self.source is None:
+            errors = []
+        else:
+            errors = await self.source.create_applications(apps, chunk_size)
+        failed = {i for i, _ in errors}
+        written = [app for i, app in enumerate(apps) if i not in failed]
+        for app in written:
+            self._apply(app)
+        self._notify(written)
+        return errors
+
+    def _apply(self, app: Application):
+        index = self.index
+        main = self._upsert(app.applicationId, _app_row(app))
+        for upstream in app.upstreamApps:
+            if upstream.appId and upstream.appName:
+                node = self._upsert(upstream.appId, {"applicationName": upstream.appName})
+                index.add_edge(node, main)
+        for downstream in app.downstreamApps:
+            if downstream.appId and downstream.appName:
+                node = self._upsert(downstream.appId, {"applicationName": downstream.appName})
+                index.add_edge(main, node)
+        for api in app.exposed_apis():
+            consumer = self.apis.upsert_api(app.applicationId, api.apiName, api.apiEndpoint)
+            for ref in api.consumes:
+                self._upsert(ref.appId, {})
+                self.apis.add_consumes(consumer, self.apis.upsert_api(ref.appId, ref.apiName))
+
+    def _upsert(self, app_id: str, props: dict) -> int:
+        """GraphIndex.upsert_node that also keeps the name ordering current."""
+        node = self.index.lookup(app_id)
+        old_name = None if node is None else self.index.get(node, "applicationName")
+        node = self.index.upsert_node(app_id, props)
+        move_name(self._by_name, app_id, old_name, self.index.get(node, "applicationName"))
+        return node
+
+    async def list_applications(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                                prefix: str = "") -> List[dict]:
+        keys = self._by_name
+        start = bisect_right(keys, after) if after else 0
+        start = max(start, bisect_left(keys, (prefix, "")))
+        applications = []
+        for name, app_id in keys[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            applications.append({"applicationId": app_id, "applicationName": name})
+        return applications
+
+    async def get_application(self, app_id: str) -> Optional[dict]:
+        main = self.index.lookup(app_id)
+        return None if main is None else self.index.node(main)
+
+    async def expand(self, upstream_ids: List[str], downstream_ids: List[str],
+                     limit: int) -> List[Tuple[str, str, str, dict]]:
+        index = self.index
+        found = []
+        for app_id in upstream_ids:
+            target = index.lookup(app_id)
+            for node in index.predecessors(target):
+                found.append(("upstream", index.app_id(node), app_id, self._summary(node)))
+                if len(found) >= limit:
+                    return found
+        for app_id in downstream_ids:
+            source = index.lookup(app_id)
+            for node in index.successors(source):
+                found.append(("downstream", app_id, index.app_id(node), self._summary(node)))
+                if len(found) >= limit:
+                    return found
+        return found
+
+    async def get_application_apis(self, app_id: str) -> List[dict]:
+        apis = sorted(self.apis.apis_of(app_id), key=lambda api: api["apiName"])
+        return [{"apiName": api["apiName"], "apiEndpoint": api["apiEndpoint"]} for api in apis]
+
+    async def get_api(self, key: str) -> Optional[dict]:
+        api = self.apis.get(key)
+        return None if api is None else self._api_summary(api)
+
+    async def expand_apis(self, upstream_ids: List[str], downstream_ids: List[str],
+                          limit: int) -> List[Tuple[str, str, str, dict]]:
+        apis = self.apis
+        found = []
+        for key in upstream_ids:
+            for provider in apis.providers(key):
+                found.append(("upstream", provider, key, self._api_summary(apis.get(provider))))
+                if len(found) >= limit:
+                    return found
+        for key in downstream_ids:
+            for consumer in apis.consumers(key):
+                found.append(("downstream", key, consumer, self._api_summary(apis.get(consumer))))
+                if len(found) >= limit:
+                    return found
+        return found
+
+    def export_graph(self) -> Tuple[AsyncIterator[dict], AsyncIterator[Tuple[str, str]]]:
+        return _aiter(self.index.iter_nodes()), _aiter(self.index.iter_edges())
+
+    def export_apis(self) -> Tuple[AsyncIterator[dict], AsyncIterator[Tuple[str, str]]]:
+        return _aiter(self.apis.iter_apis()), _aiter(self.apis.iter_consumes())
+
+    async def graph_index(self) -> GraphIndex:
+        # Share the live index; it is updated before write listeners run
+        return self.index
+
+    async def api_index(self) -> ApiIndex:
+        return self.apis
+
+    def _summary(self, node: int) -> dict:
+        return {
+            "applicationId": self.index.app_id(node),
+            "applicationName": self.index.get(node, "applicationName")
+        }
+
+    def _api_summary(self, api: dict) -> dict:
+        node = self.index.lookup(api["applicationId"])
+        return dict(api, applicationName=None if node is None else self.index.get(node, "applicationName"))
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def _app_row(app: Application) -> dict:
+    """Application node properties; apiName/apiEndpoint hold the first API, as before APIs had nodes."""
+    apis = app.exposed_apis()
+    return {
+        "applicationName": app.applicationName,
+        "capabilityName": app.capabilityName,
+        "apiName": apis[0].apiName if apis else app.apiName,
+        "apiEndpoint": apis[0].apiEndpoint if apis else app.apiEndpoint,
+    }
+
+
+def _bulk_rows(apps: List[Application]) -> Tuple[List[dict], List[dict], List[dict]]:
+    """Flatten applications into UNWIND parameter rows: apps, neighbor nodes, edges."""
+    app_rows = []
+    neighbor_rows = []
+    rel_rows = []
+    for app in apps:
+        app_rows.append(dict(_app_row(app), applicationId=app.applicationId))
+        for upstream in app.upstreamApps:
+            if upstream.appId and upstream.appName:  # Only create if data exists
+                neighbor_rows.append({"applicationId": upstream.appId, "applicationName": upstream.appName})
+                rel_rows.append({"upstreamId": upstream.appId, "downstreamId": app.applicationId})
+        for downstream in app.downstreamApps:
+            if downstream.appId and downstream.appName:
+                neighbor_rows.append({"applicationId": downstream.appId, "applicationName": downstream.appName})
+                rel_rows.append({"upstreamId": app.applicationId, "downstreamId": downstream.appId})
+    return app_rows, neighbor_rows, rel_rows
+
+
+def _api_rows(apps: List[Application]) -> Tuple[List[dict], List[dict]]:
+    """UNWIND parameter rows for the APIs of apps and their CONSUMES edges."""
+    api_rows = []
+    consume_rows = []
+    for app in apps:
+        for api in app.exposed_apis():
+            consumer = api_id(app.applicationId, api.apiName)
+            api_rows.append({
+                "apiId": consumer,
+                "applicationId": app.applicationId,
+                "apiName": api.apiName,
+                "apiEndpoint": api.apiEndpoint
+            })
+            for ref in api.consumes:
+                consume_rows.append({
+                    "consumerId": consumer,
+                    "providerId": api_id(ref.appId, ref.apiName),
+                    "providerAppId": ref.appId,
+                    "providerApiName": ref.apiName
+                })
+    return api_rows, consume_rows
+
+
+async def _execute(runner, name: str, query: str, params: dict):
+    """Run a write query on a session or transaction and wait for it to complete."""
+    with observe_query(name, params):
+        result = await runner.run(query, params)
+        await result.consume()
+
+
+async def _migrate(session, name: str, query: str, params: dict):
+    """Run a one-off migration unless the database records it as applied, then record it."""
+    with observe_query("migration_applied", {"name": name}):
+        result = await session.run(MIGRATION_APPLIED_QUERY, {"name": name})
+        record = await result.single()
+    if record["applied"]:
+        return
+    logger.info("Applying migration %s", name)
+    await _execute(session, f"migrate_{name}", query, params)
+    await _execute(session, "migration_done", MIGRATION_DONE_QUERY, {"name": name})
+
+
+async def _write_applications(tx, app_rows: List[dict], neighbor_rows: List[dict], rel_rows: List[dict],
+                              api_rows: List[dict], consume_rows: List[dict]):
+    if neighbor_rows:
+        await _execute(tx, "bulk_neighbors", BULK_NEIGHBORS_QUERY, {"neighbors": neighbor_rows})
+    await _execute(tx, "bulk_apps", BULK_APPS_QUERY, {"apps": app_rows})
+    if rel_rows:
+        await _execute(tx, "bulk_rels", BULK_RELS_QUERY, {"rels": rel_rows})
+    await _write_apis(tx, api_rows, consume_rows)
+    await _execute(tx, "bump_version", BUMP_VERSION_QUERY, {})
+
+
+async def _write_apis(runner, api_rows: List[dict], consume_rows: List[dict]):
+    if api_rows:
+        await _execute(runner, "bulk_apis", BULK_APIS_QUERY, {"apis": api_rows})
+    if consume_rows:
+        await _execute(runner, "bulk_consumes", BULK_CONSUMES_QUERY, {"consumes": consume_rows})
+
+
+def create_store() -> GraphStore:
+    """Pick the storage backend from GRAPH_BACKEND: neo4j (default), indexed or memory."""
+    backend = os.getenv("GRAPH_BACKEND", "neo4j").lower()
+    if backend == "neo4j":
+        return GraphDB()
+    if backend == "indexed":
+        return IndexedGraphDB(source=GraphDB())
+    if backend == "memory":
+        return IndexedGraphDB()
+    raise ValueError(f"Unknown GRAPH_BACKEND: {backend}")
@@ -0,0 +1,236 @@
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Application properties kept in the index, besides applicationId
+NODE_FIELDS = ("applicationName", "capabilityName", "apiName", "apiEndpoint")
+
+# Fold delta edges into the CSR arrays once they reach this share of the graph
+COMPACT_RATIO = 0.1
+COMPACT_MIN_EDGES = 1024
+
+
+def _build_csr(num_nodes: int, src: array, dst: array) -> Tuple[array, array]:
+    """Counting-sort (src, dst) pairs into CSR offsets/targets with sorted, unique rows."""
+    offsets = array("q", bytes(8 * (num_nodes + 1)))
+    for s in src:
+        offsets[s + 1] += 1
+    for i in range(num_nodes):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array("q", offsets[:-1])
+    targets = array("i", bytes(4 * len(src)))
+    for s, d in zip(src, dst):
+        targets[cursor[s]] = d
+        cursor[s] += 1
+
+    # Sort each row and drop duplicate edges (MERGE semantics)
+    row_offsets = array("q", [0])
+    row_targets = array("i")
+    for i in range(num_nodes):
+        row_targets.extend(sorted(set(targets[offsets[i]:offsets[i + 1]])))
+        row_offsets.append(len(row_targets))
+    return row_offsets, row_targets
+
+
+def move_name(keys: List[Tuple[str, str]], app_id: str, old_name: Optional[str], new_name: Optional[str]):
+    """Keep keys, the sorted (applicationName, applicationId) pairs of named nodes, sorted after a rename."""
+    if new_name != old_name:
+        if old_name:
+            del keys[bisect_left(keys, (old_name, app_id))]
+        if new_name:
+            insort(keys, (new_name, app_id))
+
+
+class GraphIndex:
+    """Compact in-process index of Application nodes and PROVIDES_TO edges.
+
+    applicationId strings are interned to dense integer ids. Adjacency is held in
+    CSR form (an offsets array and a targets array) for both directions; edges
+    added after the last build go to small per-node delta lists that compact()
+    folds back into the arrays.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._lookup: Dict[str, int] = {}
+        self._attrs: List[tuple] = []
+
+        self._out_offsets = array("q", [0])
+        self._out_targets = array("i")
+        self._in_offsets = array("q", [0])
+        self._in_targets = array("i")
+        self._out_delta: Dict[int, List[int]] = {}
+        self._in_delta: Dict[int, List[int]] = {}
+        self._delta_edges = 0
+
+    @classmethod
+    def build(cls, nodes: Iterable[dict], edges: Iterable[Tuple[str, str]]) -> "GraphIndex":
+        """Build an index from node property dicts and (upstreamId, downstreamId) pairs."""
+        index = cls()
+        for node in nodes:
+            index.upsert_node(node["applicationId"], node)
+
+        src = array("i")
+        dst = array("i")
+        for upstream_id, downstream_id in edges:
+            src.append(index.upsert_node(upstream_id))
+            dst.append(index.upsert_node(downstream_id))
+        index.set_edges(src, dst)
+        return index
+
+    @classmethod
+    def from_csr(cls, ids: List[str], attrs: List[tuple], out_offsets, out_targets,
+                 in_offsets, in_targets) -> "GraphIndex":
+        """An index over prebuilt CSR adjacency, e.g. memoryviews into a mapped snapshot.
+
+        Offsets are int64 and targets int32 sequences with sorted, unique rows.
+        They are only read; the next compact() replaces them with fresh arrays.
+        """
+        index = cls()
+        index._ids = ids
+        index._lookup = dict(zip(ids, range(len(ids))))
+        index._attrs = attrs
+        index._out_offsets, index._out_targets = out_offsets, out_targets
+        index._in_offsets, index._in_targets = in_offsets, in_targets
+        return index
+
+    def copy(self) -> "GraphIndex":
+        """A copy that later writes to this index do not change.
+
+        The CSR arrays are shared: they are never changed in place, only
+        replaced by compact().
+        """
+        index = GraphIndex()
+        index._ids = list(self._ids)
+        index._lookup = dict(self._lookup)
+        index._attrs = list(self._attrs)
+        index._out_offsets, index._out_targets = self._out_offsets, self._out_targets
+        index._in_offsets, index._in_targets = self._in_offsets, self._in_targets
+        index._out_delta = {node: list(row) for node, row in self._out_delta.items()}
+        index._in_delta = {node: list(row) for node, row in self._in_delta.items()}
+        index._delta_edges = self._delta_edges
+        return index
+
+    def csr(self) -> Tuple[array, array, array, array]:
+        """Out offsets, out targets, in offsets and in targets, with delta edges compacted in."""
+        self.compact()
+        return self._out_offsets, self._out_targets, self._in_offsets, self._in_targets
+
+    def set_edges(self, src: array, dst: array):
+        """Replace all adjacency with the edges src[i] -> dst[i] between interned node ids."""
+        n = len(self._ids)
+        self._out_offsets, self._out_targets = _build_csr(n, src, dst)
+        self._in_offsets, self._in_targets = _build_csr(n, dst, src)
+        self._out_delta.clear()
+        self._in_delta.clear()
+        self._delta_edges = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, app_id: str) -> bool:
+        return app_id in self._lookup
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._out_targets) + self._delta_edges
+
+    def lookup(self, app_id: str) -> Optional[int]:
+        return self._lookup.get(app_id)
+
+    def app_id(self, node: int) -> str:
+        return self._ids[node]
+
+    def node(self, node: int) -> dict:
+        data = {"applicationId": self._ids[node]}
+        data.update(zip(NODE_FIELDS, self._attrs[node]))
+        return data
+
+    def get(self, node: int, field: str) -> Optional[str]:
+        if field == "applicationId":
+            return self._ids[node]
+        return self._attrs[node][NODE_FIELDS.index(field)]
+
+    def upsert_node(self, app_id: str, props: Optional[dict] = None) -> int:
+        """Intern app_id and SET any non-null properties given; returns the integer id."""
+        node = self._lookup.get(app_id)
+        if node is None:
+            node = len(self._ids)
+            self._ids.append(app_id)
+            self._lookup[app_id] = node
+            self._attrs.append((None,) * len(NODE_FIELDS))
+        if props:
+            current = self._attrs[node]
+            self._attrs[node] = tuple(
+                props[field] if props.get(field) is not None else current[i]
+                for i, field in enumerate(NODE_FIELDS)
+            )
+        return node
+
+    def add_rows(self, nodes: List[dict], edges: List[Tuple[str, str]]):
+        """Fold in written node property rows and (upstreamId, downstreamId) edges; idempotent."""
+        for node in nodes:
+            self.upsert_node(node["applicationId"], node)
+        for upstream_id, downstream_id in edges:
+            self.add_edge(self.upsert_node(upstream_id), self.upsert_node(downstream_id))
+
+    def successors(self, node: int) -> List[int]:
+        return self._row(node, self._out_offsets, self._out_targets, self._out_delta)
+
+    def predecessors(self, node: int) -> List[int]:
+        return self._row(node, self._in_offsets, self._in_targets, self._in_delta)
+
+    def has_edge(self, src: int, dst: int) -> bool:
+        if src < len(self._out_offsets) - 1:
+            lo, hi = self._out_offsets[src], self._out_offsets[src + 1]
+            pos = bisect_left(self._out_targets, dst, lo, hi)
+            if pos < hi and self._out_targets[pos] == dst:
+                return True
+        return dst in self._out_delta.get(src, ())
+
+    def add_edge(self, src: int, dst: int) -> bool:
+        """MERGE an edge src -> dst; returns False if it already existed."""
+        if self.has_edge(src, dst):
+            return False
+        self._out_delta.setdefault(src, []).append(dst)
+        self._in_delta.setdefault(dst, []).append(src)
+        self._delta_edges += 1
+        if self._delta_edges >= max(COMPACT_MIN_EDGES, COMPACT_RATIO * len(self._out_targets)):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Rebuild the CSR arrays to include all delta edges."""
+        if not self._delta_edges and len(self._out_offsets) - 1 == len(self._ids):
+            return
+        src = array("i")
+        dst = array("i")
+        for u, v in self._iter_int_edges():
+            src.append(u)
+            dst.append(v)
+        self.set_edges(src, dst)
+
+    def iter_nodes(self) -> Iterator[dict]:
+        for node in range(len(self._ids)):
+            yield self.node(node)
+
+    def iter_edges(self) -> Iterator[Tuple[str, str]]:
+        for u, v in self._iter_int_edges():
+            yield self._ids[u], self._ids[v]
+
+    def _iter_int_edges(self) -> Iterator[Tuple[int, int]]:
+        for u in range(len(self._ids)):
+            for v in self.successors(u):
+                yield u, v
+
+    @staticmethod
+    def _row(node: int, offsets: array, targets: array, delta: Dict[int, List[int]]) -> List[int]:
+        if node < len(offsets) - 1:
+            row = targets[offsets[node]:offsets[node + 1]].tolist()
+        else:
+            row = []
+        extra = delta.get(node)
+        if extra:
+            row.extend(extra)
+        return row
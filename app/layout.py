@@ -0,0 +1,90 @@
+from typing import Dict, List, Tuple
+
+import networkx as nx
+
+# Distance between neighboring nodes in a layer and between layers
+NODE_SPACING = 250
+LAYER_SPACING = 200
+# Barycenter passes (one downward plus one upward each) to reduce crossings
+ORDERING_SWEEPS = 4
+
+
+def _key(node: dict) -> str:
+    # API lineage payloads identify their nodes by apiId
+    return node.get("apiId") or node["applicationId"]
+
+
+def _layers(data: dict) -> Dict[str, int]:
+    """Layer of every node: upstream apps above the root by hop count, downstream apps below."""
+    root = _key(data["mainApp"])
+    layer = {root: 0}
+    for app in data["upstreamApps"]:
+        layer.setdefault(_key(app), -app.get("depth", 1))
+    for app in data["downstreamApps"]:
+        layer.setdefault(_key(app), app.get("depth", 1))
+    return layer
+
+
+def _edges(data: dict) -> List[Tuple[str, str]]:
+    if "edges" in data:
+        return [(edge["source"], edge["target"]) for edge in data["edges"]]
+    # Payloads without edges are single-hop: the root and its direct neighbors
+    root = _key(data["mainApp"])
+    return ([(_key(app), root) for app in data["upstreamApps"]]
+            + [(root, _key(app)) for app in data["downstreamApps"]])
+
+
+def layered_layout(data: dict) -> dict:
+    """Sugiyama-style layered layout of a supply-chain payload.
+
+    Nodes are layered by their distance from the root; edges spanning several
+    layers are routed through dummy nodes, and each layer is ordered by
+    repeated barycenter sweeps to reduce edge crossings. Returns {x, y}
+    positions by applicationId (by apiId for API lineage).
+    """
+    layer = _layers(data)
+    graph = nx.DiGraph()
+    for node, level in layer.items():
+        graph.add_node(node, layer=level)
+    for source, target in _edges(data):
+        if source not in layer or target not in layer or layer[source] == layer[target]:
+            continue
+        # Orient every edge downward through the layers for ordering purposes
+        upper, lower = (source, target) if layer[source] < layer[target] else (target, source)
+        previous = upper
+        for level in range(layer[upper] + 1, layer[lower]):
+            dummy = ("dummy", upper, lower, level)
+            graph.add_node(dummy, layer=level)
+            graph.add_edge(previous, dummy)
+            previous = dummy
+        graph.add_edge(previous, lower)
+
+    # Initial order within a layer follows the payload (BFS discovery order)
+    rows: Dict[int, list] = {}
+    for node, level in graph.nodes(data="layer"):
+        rows.setdefault(level, []).append(node)
+    levels = sorted(rows)
+    position = {node: i for row in rows.values() for i, node in enumerate(row)}
+
+    def reorder(level: int, neighbors):
+        row = rows[level]
+        keys = {}
+        for node in row:
+            adjacent = [position[other] for other in neighbors(node)]
+            keys[node] = sum(adjacent) / len(adjacent) if adjacent else position[node]
+        row.sort(key=lambda node: keys[node])
+        for i, node in enumerate(row):
+            position[node] = i
+
+    for _ in range(ORDERING_SWEEPS):
+        for level in levels[1:]:
+            reorder(level, graph.predecessors)
+        for level in reversed(levels[:-1]):
+            reorder(level, graph.successors)
+
+    positions = {}
+    for level, row in rows.items():
+        for i, node in enumerate(row):
+            if isinstance(node, str):
+                positions[node] = {"x": (i - (len(row) - 1) / 2) * NODE_SPACING, "y": level * LAYER_SPACING}
+    return {"positions": positions, "layers": len(levels)}
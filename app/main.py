@@ -1,10 +1,246 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-from neo4j import GraphDatabase
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.api_index import ApiIndex
+from app.bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, NDJSON_TYPES, BulkIngest, iter_ndjson
+from app.cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS, CacheEntry, ResponseCache, etag_matches
+from app.changes import (
+    CHANGELOG_MAX_ENTRIES,
+    CHANGES_MAX_PAGE_SIZE,
+    CHANGES_PAGE_SIZE,
+    MAX_WAIT_SECONDS,
+    ChangeLog,
+)
+from app.db import create_store
+from app.graph_index import GraphIndex
+from app.layout import layered_layout
+from app.metrics import CONTENT_TYPE, REQUEST_SECONDS, registry
+from app.models import Application, SupplyChainsRequest
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.paths import DEFAULT_MAX_LENGTH, MAX_PATHS
+from app.reachability import DEFAULT_MAX_COMPONENTS, ReachabilityIndex, ReachabilityUnavailable
+from app.search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, MIN_QUERY_LENGTH, SearchIndex
+from app.singleflight import DEFAULT_MAX_WAIT_SECONDS, SingleFlight
+from app.snapshot import restore, write_snapshot
+from app.stats import DEFAULT_TOP, MAX_TOP, GraphStats
+from app.traversal import (
+    DEFAULT_MAX_EDGES,
+    DEFAULT_MAX_NODES,
+    MAX_DEPTH,
+    MAX_EDGES_LIMIT,
+    MAX_NODES_LIMIT,
+)
+from app.writebehind import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_FLUSH_SECONDS,
+    DEFAULT_MAX_MERGES,
+    DEFAULT_MAX_PENDING,
+    QueueFull,
+    WriteBehindQueue,
+)
+
+# Only the app logger is configured here; the root logger (and uvicorn's, httpx's,
+# ...) is left to whoever runs the application
+app_logger = logging.getLogger("app")
+app_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+if not app_logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    app_logger.addHandler(_log_handler)
+    app_logger.propagate = False
+logger = logging.getLogger(__name__)
+
+db = create_store()
+
+# Supply-chain read cache; entries are dropped when a write touches one of their nodes
+cache = ResponseCache(
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    ttl=float(os.getenv("CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+)
+# Server-side layouts, kept until a write touches one of their nodes
+layouts = ResponseCache(
+    max_entries=int(os.getenv("LAYOUT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    ttl=float(os.getenv("LAYOUT_CACHE_TTL_SECONDS", "3600")),
+)
+
+
+# Concurrent cache misses for the same key share one store query
+flights = SingleFlight("supply_chain", float(os.getenv("SINGLE_FLIGHT_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS)))
+
+
+def _invalidate(nodes, edges):
+    node_ids = [node["applicationId"] for node in nodes]
+    cache.invalidate(node_ids)
+    layouts.invalidate(node_ids)
+
+
+db.add_listener(_invalidate)
+
+# Versioned change feed of node and edge upserts for clients that mirror the graph
+changes = ChangeLog(
+    max_entries=int(os.getenv("CHANGELOG_MAX_ENTRIES", CHANGELOG_MAX_ENTRIES)),
+    path=os.getenv("CHANGELOG_PATH") or None,
+)
+db.add_listener(changes.record)
+db.add_api_listener(changes.record_apis)
+# NDJSON lines sent per chunk of a streamed multi-root supply chain
+NDJSON_LINES_PER_CHUNK = 500
+
+# Idle seconds between SSE keep-alive comments
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Optional write-behind mode: registrations are acknowledged with a ticket and written in batches
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND", "0") == "1"
+write_queue = WriteBehindQueue(
+    db,
+    max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", DEFAULT_MAX_PENDING)),
+    batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)),
+    max_merges=int(os.getenv("WRITE_BEHIND_MAX_MERGES", DEFAULT_MAX_MERGES)),
+)
+# Seconds a client is told to wait when the queue is full
+WRITE_BEHIND_RETRY_AFTER = 1
+
+# Snapshot of the application graph, restored and caught up from the change log at
+# startup instead of reading the whole graph from the store, and rewritten at shutdown
+SNAPSHOT_PATH = os.getenv("GRAPH_SNAPSHOT_PATH") or None
+
+# The in-process application graph and API index: the store's own for the indexed and
+# memory backends, else copies kept current from the writes. Rewritten at shutdown
+graph = GraphIndex()
+apis = ApiIndex()
+
+
+def _fold_graph(nodes, edges):
+    graph.add_rows(nodes, edges)
+
+
+def _fold_apis(api_rows, consumes):
+    apis.add_rows(api_rows, consumes)
+
+
+db.add_listener(_fold_graph)
+db.add_api_listener(_fold_apis)
+
+# The indexes derived from that graph are built in a worker thread after startup.
+# Until they are ready, the writes made meanwhile are held back from their listeners
+# and the endpoints reading them answer 503
+indexes_ready = asyncio.Event()
+_held_writes: Optional[list] = None
+INDEXES_RETRY_AFTER = 5
+
+
+def _derived(listener):
+    """listener, with the writes made while the derived indexes are built held back until they are."""
+    def apply_or_hold(*args):
+        if indexes_ready.is_set():
+            listener(*args)
+        elif _held_writes is not None:
+            _held_writes.append((listener, args))
+    return apply_or_hold
+
+
+def _require_indexes():
+    if not indexes_ready.is_set():
+        raise HTTPException(status_code=503, detail="Indexes are still being built",
+                            headers={"Retry-After": str(INDEXES_RETRY_AFTER)})
+
+
+# Degree statistics, maintained on writes, and API counts from the index of every
+# API (the graph's nodes keep the first only)
+stats = GraphStats(graph, apis)
+db.add_listener(_derived(stats.add_edges))
+db.add_api_listener(_derived(stats.add_apis))
+
+# Transitive upstream/downstream index for blast-radius queries.
+# Opt-in: its memory grows with the square of the number of components
+REACHABILITY_ENABLED = os.getenv("REACHABILITY_INDEX", "0") == "1"
+reachability = ReachabilityIndex(graph, int(os.getenv("REACHABILITY_MAX_COMPONENTS", DEFAULT_MAX_COMPONENTS)))
+if REACHABILITY_ENABLED:
+    db.add_listener(_derived(reachability.add_edges))
+
+# Trigram search over names, capabilities and APIs
+search_index = SearchIndex(graph, apis)
+db.add_listener(_derived(search_index.add_nodes))
+db.add_api_listener(_derived(search_index.add_apis))
+
+
+def _rebuild_indexes():
+    stats.rebuild()
+    search_index.rebuild()
+    if REACHABILITY_ENABLED:
+        reachability.rebuild()
+
+
+async def _build_indexes():
+    """Build the derived indexes from a copy of the graph in a worker thread, then apply the held writes.
 
-app = FastAPI()
+    The copy keeps writes made meanwhile from changing the graph under the
+    build; the held writes then bring the indexes up to date on the graph itself.
+    """
+    global _held_writes
+    started = time.perf_counter()
+    stats.graph = reachability.graph = search_index.graph = graph.copy()
+    stats.apis = search_index.apis = apis
+    try:
+        await asyncio.to_thread(_rebuild_indexes)
+    except Exception:
+        _held_writes = None
+        logger.exception("Building the derived indexes failed; search, stats and impact stay unavailable")
+        return
+    stats.graph = reachability.graph = search_index.graph = graph
+    held, _held_writes = _held_writes, None
+    for listener, args in held:
+        listener(*args)
+    indexes_ready.set()
+    logger.info("Built the derived indexes of %d applications in %.1fs, then applied %d held writes",
+                len(graph), time.perf_counter() - started, len(held))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the Neo4j driver pool and warm the storage backend (e.g. build the
+    # in-process graph index) before serving, then build the derived indexes in
+    # the background; close it on shutdown
+    global graph, apis, _held_writes
+    indexes_ready.clear()
+    _held_writes = []
+    changes.open()
+    snapshot = restore(SNAPSHOT_PATH, changes) if SNAPSHOT_PATH else None
+    await db.load(snapshot)
+    if snapshot is not None and not db.reflects(snapshot):
+        logger.warning("Graph snapshot %s is of store version %s, but the store is at version %d; "
+                       "loading the graph from the store", SNAPSHOT_PATH, snapshot.store_version, db.store_version)
+        snapshot = None
+    if snapshot is None:
+        graph, apis = await db.graph_index(), await db.api_index()
+    else:
+        graph, apis = snapshot.graph, snapshot.apis
+    build = asyncio.create_task(_build_indexes())
+    if WRITE_BEHIND_ENABLED:
+        write_queue.start()
+    yield
+    build.cancel()
+    with suppress(asyncio.CancelledError):
+        await build
+    if WRITE_BEHIND_ENABLED:
+        await write_queue.close()
+    if SNAPSHOT_PATH:
+        write_snapshot(graph, SNAPSHOT_PATH, changes.version, apis, await db.snapshot_version())
+    await db.close()
+    changes.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -13,159 +249,219 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
-# Data models
-class ApplicationRelation(BaseModel):
-    appId: str
-    appName: str
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw path, to keep the series bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                route=route.path if route is not None else "unmatched", status=status)
 
 
-class Application(BaseModel):
-    applicationId: str
-    applicationName: str
-    capabilityName: str
-    apiName: str
-    apiEndpoint: str
-    upstreamApps: List[ApplicationRelation]
-    downstreamApps: List[ApplicationRelation]
+def _chain_node_ids(data: dict):
+    yield data["mainApp"]["applicationId"]
+    for app in data["upstreamApps"] + data["downstreamApps"]:
+        yield app["applicationId"]
 
 
-class GraphDB:
-    def __init__(self):
-        self.driver = GraphDatabase.driver(
-            "neo4j://localhost:7687",
-            auth=("neo4j", "password")  # Replace with your Neo4j credentials
-        )
+async def _fetch_shared(key, fetch) -> Optional[CacheEntry]:
+    """Run fetch() once for all concurrent misses on key and cache its payload; None if it found nothing."""
+    generation = cache.generation
+
+    async def run():
+        data = await fetch()
+        return None if data is None else cache.put(key, data, _chain_node_ids(data), generation)
+
+    # Keyed by generation too, so a request arriving after a write never joins a read started before it
+    return await flights.do((key, generation), run)
 
-    def create_application(self, app: Application):
-        with self.driver.session() as session:
-            # Create main application node
-            session.run("""
-                MERGE (a:Application {applicationId: $appId})
-                SET a.applicationName = $appName,
-                    a.capabilityName = $capName,
-                    a.apiName = $apiName,
-                    a.apiEndpoint = $apiEndpoint
-                """,
-                        appId=app.applicationId,
-                        appName=app.applicationName,
-                        capName=app.capabilityName,
-                        apiName=app.apiName,
-                        apiEndpoint=app.apiEndpoint
-                        )
-
-            # Create relationships for upstream apps
-            for upstream in app.upstreamApps:
-                if upstream.appId and upstream.appName:  # Only create if data exists
-                    session.run("""
-                        MERGE (u:Application {applicationId: $upstreamId})
-                        SET u.applicationName = $upstreamName
-                        MERGE (u)-[:PROVIDES_TO]->(a:Application {applicationId: $mainAppId})
-                        """,
-                                upstreamId=upstream.appId,
-                                upstreamName=upstream.appName,
-                                mainAppId=app.applicationId
-                                )
-
-            # Create relationships for downstream apps
-            for downstream in app.downstreamApps:
-                if downstream.appId and downstream.appName:  # Only create if data exists
-                    session.run("""
-                        MERGE (d:Application {applicationId: $downstreamId})
-                        SET d.applicationName = $downstreamName
-                        MERGE (a:Application {applicationId: $mainAppId})-[:PROVIDES_TO]->(d)
-                        """,
-                                downstreamId=downstream.appId,
-                                downstreamName=downstream.appName,
-                                mainAppId=app.applicationId
-                                )
-
-
-db = GraphDB()
+
+def _with_layout(key, entry: CacheEntry) -> CacheEntry:
+    """entry's payload plus node positions, reusing the cached layout while the payload is unchanged."""
+    cached = layouts.get(key)
+    if cached is None or cached.payload["etag"] != entry.etag:
+        generation = layouts.generation
+        layout = layered_layout(entry.payload)
+        cached = layouts.put(key, {"etag": entry.etag, "layout": layout}, entry.node_ids, generation)
+    # The layout is a function of the payload, so its version follows the payload's ETag
+    return CacheEntry(dict(entry.payload, layout=cached.payload["layout"]),
+                      entry.etag[:-1] + '-layout"', entry.expires, entry.node_ids)
+
+
+def _etag_response(request: Request, entry: CacheEntry) -> Response:
+    """Serve a cached payload, or 304 when the client already has this version."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(entry.payload, headers=headers)
 
 
 @app.get("/api/applications/{app_id}/supply-chain")
-async def get_supply_chain(app_id: str):
+async def get_supply_chain(
+        request: Request,
+        app_id: str,
+        depth: int = Query(1, ge=1, le=MAX_DEPTH),
+        direction: str = Query("both", pattern="^(both|upstream|downstream)$"),
+        maxNodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=MAX_NODES_LIMIT),
+        maxEdges: int = Query(DEFAULT_MAX_EDGES, ge=1, le=MAX_EDGES_LIMIT),
+        layout: bool = False,
+):
+    """Supply chain of app_id; layout=true adds server-computed node positions."""
+    key = ("supply-chain", app_id, None, depth, direction, maxNodes, maxEdges)
+    entry = cache.get(key)
+    if entry is None:
+        try:
+            entry = await _fetch_shared(
+                key, lambda: db.get_supply_chain(app_id, depth, direction, maxNodes, maxEdges))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Timed out waiting for the supply chain")
+        except Exception as e:
+            logger.exception("Error fetching supply chain")
+            raise HTTPException(status_code=500, detail=str(e))
+
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+    if layout:
+        entry = _with_layout(key, entry)
+    return _etag_response(request, entry)
+
+
+def _ndjson_chain(data: dict):
+    """data as NDJSON: a roots line, one line per node and edge, then a summary line."""
+    yield json.dumps({"type": "roots", "roots": data["roots"], "missing": data["missing"],
+                      "depth": data["depth"], "direction": data["direction"]}) + "\n"
+    for kind, items in (("node", data["nodes"]), ("edge", data["edges"])):
+        for start in range(0, len(items), NDJSON_LINES_PER_CHUNK):
+            yield "".join(json.dumps(dict(item, type=kind)) + "\n"
+                          for item in items[start:start + NDJSON_LINES_PER_CHUNK])
+    yield json.dumps({"type": "summary", "nodes": len(data["nodes"]), "edges": len(data["edges"]),
+                      "truncated": data["truncated"]}) + "\n"
+
+
+@app.post("/api/supply-chains")
+async def get_supply_chains(request: Request, query: SupplyChainsRequest):
+    """Deduplicated union of the supply chains of applicationIds, streamed as NDJSON when accepted."""
     try:
-        with db.driver.session() as session:
-            result = session.run("""
-                MATCH (main:Application {applicationId: $appId})
-                OPTIONAL MATCH (upstream:Application)-[:PROVIDES_TO]->(main)
-                OPTIONAL MATCH (main)-[:PROVIDES_TO]->(downstream:Application)
-                RETURN {
-                    applicationId: main.applicationId,
-                    applicationName: main.applicationName,
-                    capabilityName: main.capabilityName,
-                    apiName: main.apiName,
-                    apiEndpoint: main.apiEndpoint
-                } as mainApp,
-                collect(distinct {
-                    applicationId: upstream.applicationId,
-                    applicationName: upstream.applicationName
-                }) as upstreamApps,
-                collect(distinct {
-                    applicationId: downstream.applicationId,
-                    applicationName: downstream.applicationName
-                }) as downstreamApps
-                """,
-                                 appId=app_id
-                                 )
-
-            data = result.single()
-            if not data:
-                raise HTTPException(status_code=404, detail="Application not found")
-
-            return {
-                "mainApp": data["mainApp"],
-                "upstreamApps": [app for app in data["upstreamApps"] if app["applicationId"] is not None],
-                "downstreamApps": [app for app in data["downstreamApps"] if app["applicationId"] is not None]
-            }
+        data = await db.get_supply_chains(query.applicationIds, query.depth, query.direction,
+                                          query.maxNodes, query.maxEdges, query.membership)
+    except Exception as e:
+        logger.exception("Error fetching supply chains")
+        raise HTTPException(status_code=500, detail=str(e))
 
+    if data is None:
+        raise HTTPException(status_code=404, detail="No application found")
+    accept = request.headers.get("accept", "")
+    if any(media_type in accept for media_type in NDJSON_TYPES):
+        return StreamingResponse(_ndjson_chain(data), media_type="application/x-ndjson")
+    return data
+
+
+@app.get("/api/applications/{app_id}/paths/{target_id}")
+async def get_paths(
+        app_id: str,
+        target_id: str,
+        k: int = Query(1, ge=1, le=MAX_PATHS),
+        maxLength: int = Query(DEFAULT_MAX_LENGTH, ge=1, le=MAX_DEPTH),
+        maxNodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=MAX_NODES_LIMIT),
+        maxEdges: int = Query(DEFAULT_MAX_EDGES, ge=1, le=MAX_EDGES_LIMIT),
+):
+    """How app_id's data reaches target_id: the k shortest paths of at most maxLength hops."""
+    try:
+        data = await db.find_paths(app_id, target_id, k, maxLength, maxNodes, maxEdges)
     except Exception as e:
-        print("Error fetching supply chain:", str(e))
+        logger.exception("Error finding paths")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if data is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return data
+
 
 @app.get("/api/applications")
-async def get_applications():
+async def get_applications(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+        q: str = "",
+):
+    """One page of applications by name; q filters by case-sensitive name prefix, after is the previous nextCursor."""
     try:
-        with db.driver.session() as session:
-            result = session.run("""
-                MATCH (a:Application)
-                WHERE a.applicationName IS NOT NULL
-                RETURN DISTINCT {
-                    applicationId: a.applicationId,
-                    applicationName: a.applicationName
-                } as application
-                ORDER BY application.applicationName
-            """)
-
-            applications = []
-            for record in result:
-                app_data = record["application"]
-                if app_data["applicationId"] and app_data["applicationName"]:  # Ensure both values exist
-                    applications.append({
-                        "applicationId": app_data["applicationId"],
-                        "applicationName": app_data["applicationName"]
-                    })
-
-            return applications
+        cursor = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        # Fetch one extra row to know whether another page follows
+        rows = await db.list_applications(limit + 1, cursor, q)
     except Exception as e:
-        print("Error fetching applications:", str(e))
+        logger.exception("Error fetching applications")
         raise HTTPException(status_code=500, detail=str(e))
 
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1]["applicationName"], items[-1]["applicationId"])
+    return {"items": items, "nextCursor": next_cursor}
+
 
 @app.post("/api/applications")
 async def create_application(application: Application):
+    if WRITE_BEHIND_ENABLED:
+        try:
+            ticket = write_queue.submit(application)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e),
+                                headers={"Retry-After": str(WRITE_BEHIND_RETRY_AFTER)})
+        return JSONResponse(
+            {"message": "Application queued", "status": "queued", "ticket": ticket["ticket"]},
+            status_code=202,
+            headers={"Location": f"/api/write-queue/tickets/{ticket['ticket']}"},
+        )
     try:
-        print("Received application data:", application.dict())  # Debug print
-        db.create_application(application)
+        logger.debug("Received application data: %s", application)
+        await db.create_application(application)
         return {"message": "Application created successfully", "status": "success"}
     except Exception as e:
-        print("Error creating application:", str(e))  # Debug print
+        logger.exception("Error creating application")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/applications/bulk")
+async def create_applications_bulk(
+        request: Request,
+        chunkSize: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+):
+    """Register many applications from a JSON array or an NDJSON stream."""
+    ingest = BulkIngest(db, chunkSize)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in NDJSON_TYPES:
+            # Write chunks as lines arrive instead of buffering the whole stream
+            async for line_no, raw in iter_ndjson(request.stream()):
+                await ingest.add(line_no, raw)
+        else:
+            try:
+                payload = await request.json()
+            except json.JSONDecodeError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+            if not isinstance(payload, list):
+                raise HTTPException(status_code=400, detail="Expected a JSON array of applications")
+            for position, raw in enumerate(payload):
+                await ingest.add(position, raw)
+        return await ingest.report()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error in bulk application import")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -178,74 +474,157 @@ async def test_endpoint():
 @app.get("/api/applications/{app_id}/apis")
 async def get_application_apis(app_id: str):
     try:
-        with db.driver.session() as session:
-            # Modified query to ensure we get all API-related fields
-            result = session.run("""
-                MATCH (a:Application {applicationId: $appId})
-                RETURN DISTINCT {
-                    apiName: a.apiName,
-                    apiEndpoint: a.apiEndpoint
-                } as api
-                WHERE a.apiName IS NOT NULL
-                ORDER BY a.apiName
-            """, appId=app_id)
-
-            apis = []
-            for record in result:
-                api_data = record["api"]
-                if api_data["apiName"]:  # Only add if apiName exists
-                    apis.append({
-                        "apiName": api_data["apiName"],
-                        "apiEndpoint": api_data["apiEndpoint"]
-                    })
-
-            print(f"Found APIs for application {app_id}:", apis)  # Debug log
-            return apis
-
+        apis = await db.get_application_apis(app_id)
+        logger.debug("Found APIs for application %s: %s", app_id, apis)
+        return apis
     except Exception as e:
-        print("Error fetching application APIs:", str(e))
+        logger.exception("Error fetching application APIs")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/applications/{app_id}/api-supply-chain")
-async def get_api_supply_chain(app_id: str, apiName: str):
+async def get_api_supply_chain(
+        request: Request,
+        app_id: str,
+        apiName: str,
+        depth: int = Query(1, ge=1, le=MAX_DEPTH),
+        maxNodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=MAX_NODES_LIMIT),
+        maxEdges: int = Query(DEFAULT_MAX_EDGES, ge=1, le=MAX_EDGES_LIMIT),
+        layout: bool = False,
+):
+    """Lineage of app_id's API apiName over CONSUMES: the APIs it reads from (upstream) and its readers."""
+    key = ("api-supply-chain", app_id, apiName, depth, "both", maxNodes, maxEdges)
+    entry = cache.get(key)
+    if entry is None:
+        try:
+            entry = await _fetch_shared(
+                key, lambda: db.get_api_supply_chain(app_id, apiName, depth, maxNodes, maxEdges))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Timed out waiting for the API supply chain")
+        except Exception as e:
+            logger.exception("Error fetching API supply chain")
+            raise HTTPException(status_code=500, detail=str(e))
+
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Application or API not found")
+    if layout:
+        entry = _with_layout(key, entry)
+    return _etag_response(request, entry)
+
+
+@app.get("/api/search")
+async def search_applications(
+        q: str = Query(..., min_length=MIN_QUERY_LENGTH),
+        limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+):
+    """Applications whose name, capability, API name or endpoint matches q, best match first."""
+    _require_indexes()
+    return {"items": search_index.search(q, limit)}
+
+
+@app.get("/api/applications/{app_id}/impact")
+async def get_impact(app_id: str, target: Optional[str] = None):
+    """How many applications app_id transitively feeds and depends on; target checks one app."""
+    if not REACHABILITY_ENABLED:
+        raise HTTPException(status_code=503, detail="Reachability index is disabled")
+    _require_indexes()
     try:
-        with db.driver.session() as session:
-            result = session.run("""
-                MATCH (main:Application {applicationId: $appId, apiName: $apiName})
-                OPTIONAL MATCH (upstream:Application)-[:PROVIDES_TO]->(main)
-                OPTIONAL MATCH (main)-[:PROVIDES_TO]->(downstream:Application)
-                WHERE upstream.apiName = $apiName OR downstream.apiName = $apiName
-                RETURN {
-                    applicationId: main.applicationId,
-                    applicationName: main.applicationName,
-                    apiName: main.apiName,
-                    apiEndpoint: main.apiEndpoint
-                } as mainApp,
-                collect(distinct {
-                    applicationId: upstream.applicationId,
-                    applicationName: upstream.applicationName,
-                    apiName: upstream.apiName,
-                    apiEndpoint: upstream.apiEndpoint
-                }) as upstreamApps,
-                collect(distinct {
-                    applicationId: downstream.applicationId,
-                    applicationName: downstream.applicationName,
-                    apiName: downstream.apiName,
-                    apiEndpoint: downstream.apiEndpoint
-                }) as downstreamApps
-            """, appId=app_id, apiName=apiName)
-
-            data = result.single()
-            if not data:
-                raise HTTPException(status_code=404, detail="Application or API not found")
-
-            return {
-                "mainApp": data["mainApp"],
-                "upstreamApps": [app for app in data["upstreamApps"] if app["applicationId"] is not None],
-                "downstreamApps": [app for app in data["downstreamApps"] if app["applicationId"] is not None]
-            }
+        result = reachability.impact(app_id, target)
+    except ReachabilityUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return result
 
-    except Exception as e:
-        print("Error fetching API supply chain:", str(e))
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+
+@app.get("/api/stats")
+async def get_stats(top: int = Query(DEFAULT_TOP, ge=1, le=MAX_TOP)):
+    """Application and relationship counts, degree aggregates and the most connected applications."""
+    _require_indexes()
+    return stats.summary(top)
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return dict(cache.stats(), singleFlight=flights.stats())
+
+
+@app.get("/api/write-queue/tickets/{ticket_id}")
+async def get_write_ticket(ticket_id: str):
+    """Status of a queued registration: queued, written or failed (with the error)."""
+    ticket = write_queue.ticket(ticket_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return ticket
+
+
+@app.get("/api/write-queue/stats")
+async def get_write_queue_stats():
+    return dict(write_queue.stats(), enabled=WRITE_BEHIND_ENABLED)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Query, connection-pool and request metrics in the Prometheus text format."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+def _check_since(since: int):
+    # Other workers may have appended to a shared change-log file
+    changes.refresh()
+    if not changes.available(since):
+        raise HTTPException(
+            status_code=410,
+            detail=f"Changes after version {since} are not available; reload and resume from version {changes.version}",
+        )
+
+
+@app.get("/api/changes")
+async def get_changes(
+        since: int = Query(0, ge=0),
+        limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_MAX_PAGE_SIZE),
+        wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS),
+):
+    """Graph changes after version since; with wait, long-poll up to wait seconds for the next one."""
+    _check_since(since)
+    if wait:
+        await changes.wait(since, wait)
+    items = changes.changes_since(since, limit)
+    next_since = items[-1]["version"] if items else since
+    return {
+        "version": changes.version,
+        "nextSince": next_since,
+        "more": next_since < changes.version,
+        "changes": items,
+    }
+
+
+@app.get("/api/changes/stream")
+async def stream_changes(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """Server-sent events, one per change after since (default: from now on); resumes from Last-Event-ID."""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    if since is None:
+        since = changes.version
+    _check_since(since)
+
+    async def events():
+        position = since
+        while not await request.is_disconnected():
+            if not changes.available(position):
+                # Fell behind the retained log; the client has to reload
+                yield f"event: reset\ndata: {json.dumps({'version': changes.version})}\n\n"
+                return
+            batch = changes.changes_since(position, CHANGES_PAGE_SIZE)
+            for change in batch:
+                yield f"id: {change['version']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+            if batch:
+                position = batch[-1]["version"]
+            elif not await changes.wait(position, SSE_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, shared by query, pool-wait and request histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Queries taking at least this long are written to the slow-query log
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "500")) / 1000
+# Longest list parameter echoed in full to the slow-query log
+SLOW_QUERY_MAX_ITEMS = 20
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+slow_query_log = logging.getLogger("app.slow_query")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, in the Prometheus layout."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total[0]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+QUERY_SECONDS = registry.register(Histogram(
+    "graph_query_seconds", "Cypher query latency in seconds, including result consumption.", ["query"]))
+QUERY_ROWS = registry.register(Counter(
+    "graph_query_rows_total", "Rows returned by Cypher queries.", ["query"]))
+QUERY_ERRORS = registry.register(Counter(
+    "graph_query_errors_total", "Cypher queries that raised, by exception type.", ["query", "error"]))
+POOL_WAIT_SECONDS = registry.register(Histogram(
+    "graph_pool_wait_seconds", "Time spent waiting for a free Neo4j connection slot.", ["query"]))
+REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_seconds", "HTTP request latency in seconds.", ["method", "route", "status"]))
+READ_FLIGHTS = registry.register(Counter(
+    "graph_read_flights_total",
+    "Coalesced reads: executed ran the query, shared joined one in flight, timeout gave up waiting.",
+    ["group", "outcome"]))
+
+
+class QueryObservation:
+    """Yielded by observe_query(); set rows to the number of rows the query returned."""
+    __slots__ = ("name", "rows")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+
+
+def _loggable(params: Optional[dict]) -> dict:
+    """Query parameters for the slow-query log, with long lists cut short."""
+    loggable = {}
+    for key, value in (params or {}).items():
+        if isinstance(value, (list, tuple)) and len(value) > SLOW_QUERY_MAX_ITEMS:
+            value = {"items": list(value[:SLOW_QUERY_MAX_ITEMS]), "total": len(value)}
+        loggable[key] = value
+    return loggable
+
+
+@contextmanager
+def observe_query(name: str, params: Optional[dict] = None) -> Iterator[QueryObservation]:
+    """Record latency, rows and errors for the Cypher query run inside the block.
+
+    Queries slower than SLOW_QUERY_SECONDS are logged as one JSON object with
+    their parameters.
+    """
+    observation = QueryObservation(name)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield observation
+    except Exception as e:
+        error = type(e).__name__
+        QUERY_ERRORS.inc(query=name, error=error)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        QUERY_SECONDS.observe(elapsed, query=name)
+        QUERY_ROWS.inc(observation.rows, query=name)
+        if elapsed >= SLOW_QUERY_SECONDS:
+            slow_query_log.warning(json.dumps({
+                "query": name,
+                "seconds": round(elapsed, 4),
+                "rows": observation.rows,
+                "error": error,
+                "params": _loggable(params),
+            }, default=str))
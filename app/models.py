@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+from app.traversal import DEFAULT_MAX_EDGES, DEFAULT_MAX_NODES, MAX_DEPTH, MAX_EDGES_LIMIT, MAX_NODES_LIMIT, MAX_ROOTS
+
+
+# Data models
+class ApplicationRelation(BaseModel):
+    appId: str
+    appName: str
+
+
+class ApiReference(BaseModel):
+    appId: str
+    apiName: str
+
+
+class ApplicationApi(BaseModel):
+    apiName: str
+    apiEndpoint: str = ""
+    # APIs of other applications this API reads from
+    consumes: List[ApiReference] = []
+
+
+class Application(BaseModel):
+    applicationId: str
+    applicationName: str
+    capabilityName: str
+    # Single-API form, still accepted; apis can list any number of APIs
+    apiName: str = ""
+    apiEndpoint: str = ""
+    apis: List[ApplicationApi] = []
+    upstreamApps: List[ApplicationRelation]
+    downstreamApps: List[ApplicationRelation]
+
+    def exposed_apis(self) -> List[ApplicationApi]:
+        """apis, preceded by the single-API apiName/apiEndpoint when it is set and not listed again."""
+        apis = list(self.apis)
+        if self.apiName and all(api.apiName != self.apiName for api in apis):
+            apis.insert(0, ApplicationApi(apiName=self.apiName, apiEndpoint=self.apiEndpoint))
+        return apis
+
+
+class SupplyChainsRequest(BaseModel):
+    applicationIds: List[str] = Field(min_length=1, max_length=MAX_ROOTS)
+    depth: int = Field(1, ge=1, le=MAX_DEPTH)
+    direction: Literal["both", "upstream", "downstream"] = "both"
+    maxNodes: int = Field(DEFAULT_MAX_NODES, ge=1, le=MAX_NODES_LIMIT)
+    maxEdges: int = Field(DEFAULT_MAX_EDGES, ge=1, le=MAX_EDGES_LIMIT)
+    # Add upstreamOf/downstreamOf root indexes to every node
+    membership: bool = False
@@ -0,0 +1,24 @@
+import base64
+import json
+from typing import Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(application_name: str, application_id: str) -> str:
+    """Opaque keyset cursor pointing just past (applicationName, applicationId)."""
+    raw = json.dumps([application_name, application_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        application_name, application_id = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(application_name, str) or not isinstance(application_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return application_name, application_id
@@ -0,0 +1,137 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Set
+
+from app.traversal import DEFAULT_MAX_EDGES, DEFAULT_MAX_NODES, Expand
+
+DEFAULT_MAX_LENGTH = 6
+MAX_PATHS = 20
+# Partial paths examined while enumerating before the search gives up
+MAX_SEARCH_STEPS = 100000
+
+
+class _Side:
+    """One end of the bidirectional search: BFS distances from its root and the unexpanded frontier."""
+
+    def __init__(self, root: str):
+        self.dist: Dict[str, int] = {root: 0}
+        self.frontier: List[str] = [root]
+        self.level = 0
+
+
+async def find_paths(expand: Expand, source: str, target: str, k: int = 1,
+                     max_length: int = DEFAULT_MAX_LENGTH, max_nodes: int = DEFAULT_MAX_NODES,
+                     max_edges: int = DEFAULT_MAX_EDGES, known: Optional[Dict[str, dict]] = None) -> dict:
+    """Shortest PROVIDES_TO paths from source to target.
+
+    A bidirectional BFS grows a downstream ball around source and an upstream
+    ball around target, always expanding the smaller frontier with one batched
+    expand() call, until they meet. With k > 1 the balls keep growing until
+    their radii add up to max_length, which guarantees they contain every edge
+    of every path of at most that length; the k shortest simple paths are then
+    enumerated best-first over the collected edges, using the upstream BFS
+    distances as a lower bound on the remaining length.
+
+    Expansion stops early once max_nodes nodes or max_edges edges have been
+    collected, and enumeration after MAX_SEARCH_STEPS partial paths; the
+    result is then flagged as truncated and may miss paths. known holds
+    summaries of nodes already fetched (e.g. source and target) for the
+    returned path nodes.
+    """
+    forward = _Side(source)
+    backward = _Side(target)
+    succ: Dict[str, Set[str]] = {}
+    nodes: Dict[str, dict] = dict(known or {})
+    edge_count = 0
+    truncated = False
+    shortest = 0 if source == target else None
+
+    async def advance(side: _Side, other: _Side) -> bool:
+        """Expand side by one level; returns False once a limit is hit."""
+        nonlocal edge_count, shortest
+        remaining = max_edges - edge_count
+        if side is forward:
+            found = await expand([], side.frontier, remaining + 1)
+        else:
+            found = await expand(side.frontier, [], remaining + 1)
+        side.level += 1
+        next_frontier = []
+        for _, src, dst, neighbor in found:
+            if dst not in succ.setdefault(src, set()):
+                if edge_count >= max_edges:
+                    return False
+                succ[src].add(dst)
+                edge_count += 1
+            node_id = neighbor["applicationId"]
+            if node_id in side.dist:
+                continue
+            if node_id not in nodes and len(nodes) >= max_nodes:
+                return False
+            nodes.setdefault(node_id, neighbor)
+            side.dist[node_id] = side.level
+            next_frontier.append(node_id)
+            if node_id in other.dist:
+                length = side.level + other.dist[node_id]
+                if shortest is None or length < shortest:
+                    shortest = length
+        side.frontier = next_frontier
+        return True
+
+    def grow(limit: int):
+        # A path of length L has all its edges in the two balls once their radii add up to L
+        return forward.frontier and backward.frontier and forward.level + backward.level < limit
+
+    while shortest is None and grow(max_length) and not truncated:
+        side, other = (forward, backward) if len(forward.frontier) <= len(backward.frontier) else (backward, forward)
+        truncated = not await advance(side, other)
+
+    paths: List[List[str]] = []
+    if shortest is not None and shortest <= max_length:
+        limit = shortest if k == 1 else max_length
+        while grow(limit) and not truncated:
+            side, other = (forward, backward) if len(forward.frontier) <= len(backward.frontier) else (backward, forward)
+            truncated = not await advance(side, other)
+        paths, exhausted = _enumerate(source, target, succ, backward, k, limit)
+        truncated = truncated or exhausted
+
+    return {
+        "paths": [
+            {"length": len(path) - 1, "nodes": [nodes.get(node_id, {"applicationId": node_id}) for node_id in path]}
+            for path in paths
+        ],
+        "shortestLength": shortest if shortest is not None and shortest <= max_length else None,
+        "maxLength": max_length,
+        "truncated": truncated,
+        "explored": {"nodes": len(forward.dist.keys() | backward.dist.keys()), "edges": edge_count},
+    }
+
+
+def _enumerate(source: str, target: str, succ: Dict[str, Set[str]], backward: _Side, k: int, max_length: int):
+    """Up to k simple paths of at most max_length edges, shortest first; also returns whether the step budget ran out."""
+    # Nodes outside the upstream ball are at least one level beyond it, or unreachable once it is complete
+    outside = backward.level + 1 if backward.frontier else None
+
+    def bound(node: str):
+        return backward.dist.get(node, outside)
+
+    paths: List[List[str]] = []
+    if bound(source) is None:
+        return paths, False
+    counter = itertools.count()
+    heap = [(bound(source), next(counter), (source,))]
+    steps = 0
+    while heap and len(paths) < k:
+        steps += 1
+        if steps > MAX_SEARCH_STEPS:
+            return paths, True
+        _, _, path = heapq.heappop(heap)
+        last = path[-1]
+        if last == target:
+            paths.append(list(path))
+            continue
+        for node in sorted(succ.get(last, ())):
+            remaining = bound(node)
+            if remaining is None or node in path or len(path) + remaining > max_length:
+                continue
+            heapq.heappush(heap, (len(path) + remaining, next(counter), path + (node,)))
+    return paths, False
@@ -0,0 +1,312 @@
+import logging
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from app.graph_index import GraphIndex
+
+logger = logging.getLogger(__name__)
+
+# Components above which the index refuses to build; its bitsets take up to
+# components^2 bits in each direction
+DEFAULT_MAX_COMPONENTS = 20000
+
+
+class ReachabilityUnavailable(Exception):
+    """The graph has more components than the index is allowed to hold."""
+
+
+def _strongly_connected_components(graph: GraphIndex) -> Tuple[array, int]:
+    """Iterative Tarjan over the PROVIDES_TO graph.
+
+    Returns the component id of every node and the number of components.
+    Components are numbered in completion order, which is a reverse
+    topological order of the condensation: every edge between two components
+    points from a higher id to a lower one.
+    """
+    n = len(graph)
+    order = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    comp_of = array("i", [-1]) * n
+    stack: List[int] = []
+    counter = 0
+    num_components = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, iter(graph.successors(root)))]
+        while work:
+            node, successors = work[-1]
+            descended = False
+            for succ in successors:
+                if order[succ] == -1:
+                    order[succ] = low[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack[succ] = True
+                    work.append((succ, iter(graph.successors(succ))))
+                    descended = True
+                    break
+                if on_stack[succ] and order[succ] < low[node]:
+                    low[node] = order[succ]
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == order[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    comp_of[member] = num_components
+                    if member == node:
+                        break
+                num_components += 1
+    return comp_of, num_components
+
+
+class ReachabilityIndex:
+    """Transitive upstream/downstream reachability over PROVIDES_TO.
+
+    Cycles are condensed into strongly connected components. For every
+    component the sets of components it reaches (descendants) and that reach
+    it (ancestors) are kept as integer bitsets, so counts and membership
+    checks cost a popcount or a bit test instead of a traversal. Memory grows
+    with the square of the number of components.
+
+    add_edges() maintains the sets incrementally. An edge that closes a new
+    cycle merges the components on it into one, OR-ing their sets together;
+    only rebuild() runs Tarjan. Past max_components the index is dropped and
+    queries raise ReachabilityUnavailable.
+    """
+
+    def __init__(self, graph: GraphIndex, max_components: int = DEFAULT_MAX_COMPONENTS):
+        self.graph = graph
+        self.max_components = max_components
+        self._comp_of = array("i")
+        self._sizes: List[int] = []
+        self._desc: List[int] = []
+        self._anc: List[int] = []
+        # Extra members of multi-node components: size - 1 by component id
+        self._multi: Dict[int, int] = {}
+        # Components merged into another one since the last build, to the one they joined
+        self._merged: Dict[int, int] = {}
+        self._dirty = True
+        self._overflow = False
+        self.builds = 0
+        self.merges = 0
+
+    def rebuild(self):
+        graph = self.graph
+        comp_of, num_components = _strongly_connected_components(graph)
+        if num_components > self.max_components:
+            self._drop()
+            return
+        sizes = [0] * num_components
+        for comp in comp_of:
+            sizes[comp] += 1
+
+        # Condensation edges, grouped by source component
+        succ: List[set] = [set() for _ in range(num_components)]
+        for node in range(len(graph)):
+            comp = comp_of[node]
+            for target in graph.successors(node):
+                other = comp_of[target]
+                if other != comp:
+                    succ[comp].add(other)
+
+        # Sinks have the lowest ids, so descendants are final when read
+        desc = [0] * num_components
+        for comp in range(num_components):
+            bits = 0
+            for other in succ[comp]:
+                bits |= (1 << other) | desc[other]
+            desc[comp] = bits
+
+        # Sources have the highest ids, so ancestors are final when pushed down
+        anc = [0] * num_components
+        for comp in range(num_components - 1, -1, -1):
+            pushed = (1 << comp) | anc[comp]
+            for other in succ[comp]:
+                anc[other] |= pushed
+
+        self._comp_of, self._sizes, self._desc, self._anc = comp_of, sizes, desc, anc
+        self._multi = {comp: size - 1 for comp, size in enumerate(sizes) if size > 1}
+        self._merged = {}
+        self._dirty = False
+        self._overflow = False
+        self.builds += 1
+
+    def _drop(self):
+        """Free the bitsets of a graph with too many components."""
+        logger.warning("Reachability index disabled: more than %d components", self.max_components)
+        self._comp_of, self._sizes, self._desc, self._anc = array("i"), [], [], []
+        self._multi, self._merged = {}, {}
+        self._overflow = True
+
+    def _components(self) -> int:
+        return len(self._sizes) - len(self._merged)
+
+    def add_edges(self, nodes: List[dict], edges: List[Tuple[str, str]]):
+        """Write listener: fold newly written nodes and edges into the index."""
+        graph = self.graph
+        for node in nodes:
+            graph.upsert_node(node["applicationId"])
+        for upstream_id, downstream_id in edges:
+            src = graph.upsert_node(upstream_id)
+            dst = graph.upsert_node(downstream_id)
+            graph.add_edge(src, dst)
+            if not self._dirty and not self._overflow:
+                self._add_edge(src, dst)
+        if not self._dirty and not self._overflow and self._components() > self.max_components:
+            self._drop()
+
+    def _add_edge(self, src: int, dst: int):
+        cu = self._component(src)
+        cv = self._component(dst)
+        if cu == cv or (self._desc[cu] >> cv) & 1:
+            return
+        if (self._desc[cv] >> cu) & 1:
+            self._merge(cu, cv)
+            return
+        gained_desc = (1 << cv) | self._desc[cv]
+        gained_anc = (1 << cu) | self._anc[cu]
+        for comp in _bits(gained_anc):
+            self._desc[comp] |= gained_desc
+        for comp in _bits(gained_desc):
+            self._anc[comp] |= gained_anc
+
+    def _merge(self, cu: int, cv: int):
+        """Collapse the components on the cycle closed by an edge cu -> cv into cu.
+
+        They are the descendants of cv that are also ancestors of cu. Every
+        ancestor of one of them now reaches the descendants of all of them, and
+        the merged-away ids are replaced by cu in every set that held them.
+        """
+        cycle = ((1 << cv) | self._desc[cv]) & ((1 << cu) | self._anc[cu])
+        desc = anc = 0
+        for comp in _bits(cycle):
+            desc |= self._desc[comp]
+            anc |= self._anc[comp]
+        merged = cycle & ~(1 << cu)
+        desc &= ~cycle
+        anc &= ~cycle
+
+        for comp in _bits(merged):
+            self._sizes[cu] += self._sizes[comp]
+            self._sizes[comp] = 0
+            self._desc[comp] = self._anc[comp] = 0
+            self._multi.pop(comp, None)
+            self._merged[comp] = cu
+        self._desc[cu], self._anc[cu] = desc, anc
+        self._multi[cu] = self._sizes[cu] - 1
+
+        own = 1 << cu
+        for comp in _bits(anc):
+            self._desc[comp] = (self._desc[comp] & ~merged) | desc | own
+        for comp in _bits(desc):
+            self._anc[comp] = (self._anc[comp] & ~merged) | anc | own
+        self.merges += 1
+
+    def _component(self, node: int) -> int:
+        """Component of node, giving nodes added since the last build their own."""
+        while len(self._comp_of) <= node:
+            self._comp_of.append(len(self._sizes))
+            self._sizes.append(1)
+            self._desc.append(0)
+            self._anc.append(0)
+        comp = self._comp_of[node]
+        if comp in self._merged:
+            while comp in self._merged:
+                comp = self._merged[comp]
+            self._comp_of[node] = comp
+        return comp
+
+    def _ensure(self):
+        if self._overflow:
+            raise ReachabilityUnavailable(
+                f"The graph has more than {self.max_components} components, "
+                "the reachability index limit")
+        if self._dirty:
+            self.rebuild()
+            self._ensure()
+
+    def _count(self, comp: int, bits: int) -> int:
+        """Nodes in the components of bits, plus the other members of comp's own cycle."""
+        total = self._sizes[comp] - 1 + bits.bit_count()
+        for other, extra in self._multi.items():
+            if (bits >> other) & 1:
+                total += extra
+        return total
+
+    def downstream_count(self, node: int) -> int:
+        self._ensure()
+        comp = self._component(node)
+        return self._count(comp, self._desc[comp])
+
+    def upstream_count(self, node: int) -> int:
+        self._ensure()
+        comp = self._component(node)
+        return self._count(comp, self._anc[comp])
+
+    def reaches(self, src: int, dst: int) -> bool:
+        """True if dst is transitively downstream of src."""
+        if src == dst:
+            return False
+        self._ensure()
+        cu = self._component(src)
+        cv = self._component(dst)
+        if cu == cv:
+            # Members of a cycle reach each other
+            return self._sizes[cu] > 1
+        return bool((self._desc[cu] >> cv) & 1)
+
+    def component_size(self, node: int) -> int:
+        self._ensure()
+        return self._sizes[self._component(node)]
+
+    def stats(self) -> dict:
+        self._ensure()
+        return {
+            "nodes": len(self._comp_of),
+            "components": self._components(),
+            "largestComponent": max(self._sizes, default=0),
+            "builds": self.builds,
+            "merges": self.merges,
+        }
+
+    def impact(self, app_id: str, target_id: Optional[str] = None) -> Optional[dict]:
+        """Blast radius of app_id, optionally with its relation to target_id."""
+        node = self.graph.lookup(app_id)
+        if node is None:
+            return None
+        result = {
+            "applicationId": app_id,
+            "downstreamCount": self.downstream_count(node),
+            "upstreamCount": self.upstream_count(node),
+            "cycleSize": self.component_size(node),
+        }
+        if target_id is not None:
+            target = self.graph.lookup(target_id)
+            result["target"] = {
+                "applicationId": target_id,
+                "downstream": target is not None and self.reaches(node, target),
+                "upstream": target is not None and self.reaches(target, node),
+            }
+        return result
+
+
+def _bits(bits: int):
+    """Yield the positions of the set bits of a non-negative integer."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
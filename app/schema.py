@@ -0,0 +1,138 @@
+import logging
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constraints and indexes every store needs; all idempotent
+SCHEMA_STATEMENTS = [
+    # Also backs every MERGE/MATCH on applicationId with an index seek
+    "CREATE CONSTRAINT application_id IF NOT EXISTS FOR (a:Application) REQUIRE a.applicationId IS UNIQUE",
+    "CREATE INDEX application_name IF NOT EXISTS FOR (a:Application) ON (a.applicationName)",
+    "CREATE CONSTRAINT api_id IF NOT EXISTS FOR (p:Api) REQUIRE p.apiId IS UNIQUE",
+    "CREATE INDEX api_name IF NOT EXISTS FOR (p:Api) ON (p.apiName)",
+    "CREATE CONSTRAINT migration_name IF NOT EXISTS FOR (m:Migration) REQUIRE m.name IS UNIQUE",
+    "CREATE CONSTRAINT graph_version_name IF NOT EXISTS FOR (v:GraphVersion) REQUIRE v.name IS UNIQUE",
+    """
+    CREATE FULLTEXT INDEX application_search IF NOT EXISTS
+    FOR (a:Application) ON EACH [a.applicationName, a.capabilityName, a.apiName, a.apiEndpoint]
+    """,
+]
+
+# The constraint that DEDUPE_APPLICATIONS_QUERY makes creatable
+APPLICATION_ID_CONSTRAINT = "application_id"
+
+CONSTRAINT_EXISTS_QUERY = """
+    SHOW CONSTRAINTS YIELD name
+    WHERE name = $name
+    RETURN count(*) > 0 AS found
+"""
+
+# Older single writes MERGEd a whole (u)-[:PROVIDES_TO]->(a {applicationId}) pattern and
+# created a second Application for an existing id. Fold every such duplicate into
+# one node (its relationships moved, missing properties filled in) so the
+# applicationId uniqueness constraint can be created
+DEDUPE_APPLICATIONS_QUERY = """
+    MATCH (a:Application)
+    WHERE a.applicationId IS NOT NULL
+    WITH a.applicationId AS id, collect(a) AS nodes
+    WHERE size(nodes) > 1
+    WITH head(nodes) AS keep, tail(nodes) AS dups
+    UNWIND dups AS dup
+    CALL {
+        WITH keep, dups, dup
+        MATCH (dup)-[:PROVIDES_TO]->(d)
+        WITH keep, CASE WHEN d IN dups THEN keep ELSE d END AS target
+        MERGE (keep)-[:PROVIDES_TO]->(target)
+    }
+    CALL {
+        WITH keep, dups, dup
+        MATCH (u)-[:PROVIDES_TO]->(dup)
+        WITH keep, CASE WHEN u IN dups THEN keep ELSE u END AS source
+        MERGE (source)-[:PROVIDES_TO]->(keep)
+    }
+    CALL {
+        WITH keep, dup
+        MATCH (dup)-[:EXPOSES]->(api)
+        MERGE (keep)-[:EXPOSES]->(api)
+    }
+    WITH keep, dup, properties(keep) AS kept
+    SET keep += properties(dup)
+    SET keep += kept
+    DETACH DELETE dup
+    RETURN count(dup) AS merged
+"""
+
+# Plan operators that read every node (of a label) instead of seeking an index
+SCAN_OPERATORS = {"AllNodesScan", "NodeByLabelScan"}
+
+# name -> (query, example parameters) to check with EXPLAIN
+PlanChecks = Dict[str, Tuple[str, dict]]
+
+
+class SchemaError(RuntimeError):
+    """The database schema does not support the queries the API runs."""
+
+
+def _operators(plan) -> Set[str]:
+    """Operator types in an EXPLAIN plan tree, without the '@database' suffix."""
+    operators = {plan["operatorType"].split("@")[0]}
+    for child in plan.get("children", []):
+        operators |= _operators(child)
+    return operators
+
+
+def _check_plan(name: str, plan) -> List[str]:
+    scans = sorted(_operators(plan) & SCAN_OPERATORS)
+    return [f"{name} uses {', '.join(scans)}"] if scans else []
+
+
+async def apply_schema(session):
+    """Create the constraints and indexes, then wait until they are online.
+
+    Duplicate applicationIds are merged first, once, while the constraint does
+    not exist yet.
+    """
+    result = await session.run(CONSTRAINT_EXISTS_QUERY, {"name": APPLICATION_ID_CONSTRAINT})
+    if not (await result.single())["found"]:
+        result = await session.run(DEDUPE_APPLICATIONS_QUERY)
+        _log_merged((await result.single())["merged"])
+    for statement in SCHEMA_STATEMENTS:
+        result = await session.run(statement)
+        await result.consume()
+    result = await session.run("CALL db.awaitIndexes()")
+    await result.consume()
+
+
+async def verify_plans(session, checks: PlanChecks):
+    """EXPLAIN each query and raise SchemaError if any plan falls back to a label or all-nodes scan."""
+    problems = []
+    for name, (query, params) in checks.items():
+        result = await session.run(f"EXPLAIN {query}", params)
+        summary = await result.consume()
+        problems += _check_plan(name, summary.plan)
+    if problems:
+        raise SchemaError("Queries are not served by indexes: " + "; ".join(problems))
+
+
+def apply_schema_sync(session):
+    """apply_schema() for a synchronous driver session (bulk loaders)."""
+    if not session.run(CONSTRAINT_EXISTS_QUERY, {"name": APPLICATION_ID_CONSTRAINT}).single()["found"]:
+        _log_merged(session.run(DEDUPE_APPLICATIONS_QUERY).single()["merged"])
+    for statement in SCHEMA_STATEMENTS:
+        session.run(statement).consume()
+    session.run("CALL db.awaitIndexes()").consume()
+
+
+def verify_plans_sync(session, checks: PlanChecks):
+    problems = []
+    for name, (query, params) in checks.items():
+        summary = session.run(f"EXPLAIN {query}", params).consume()
+        problems += _check_plan(name, summary.plan)
+    if problems:
+        raise SchemaError("Queries are not served by indexes: " + "; ".join(problems))
+
+
+def _log_merged(merged: int):
+    if merged:
+        logger.warning("Merged %d duplicate Application nodes before creating the %s constraint",
+                       merged, APPLICATION_ID_CONSTRAINT)
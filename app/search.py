@@ -0,0 +1,341 @@
+import gc
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.api_index import ApiIndex
+from app.graph_index import NODE_FIELDS, GraphIndex
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+# Shortest query; two-character queries only match at the start of a field
+MIN_QUERY_LENGTH = 2
+# Share of the query's trigrams a fuzzy match must contain
+MIN_SIMILARITY = 0.5
+# Trigrams of more nodes than this barely narrow fuzzy candidates and get no postings
+FUZZY_MAX_POSTINGS = 10000
+
+# Field weights for ranking, in NODE_FIELDS order
+FIELD_WEIGHTS = {"applicationName": 4.0, "capabilityName": 2.0, "apiName": 2.0, "apiEndpoint": 1.0}
+# Score multipliers by where the query occurs in a field
+EXACT, PREFIX, SUBSTRING = 3.0, 2.0, 1.0
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Separates a value from its applicationId in bucket keys; sorts before any value character
+_KEY_SEPARATOR = "\x00"
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase text and drop everything but letters and digits, so "Payment-Gateway" matches "paymentgateway"."""
+    return _NON_ALNUM.sub("", text.lower()) if text else ""
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of a normalized field; the leading space marks the field start for short prefix queries."""
+    padded = " " + text
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Bucket:
+    """Normalized values of one field and one length, sorted by (value, applicationId).
+
+    Exact and prefix matches are a bisect range. Substring matches come from
+    str.find over the values joined into one string, where equal lengths turn
+    a position into a row by division.
+    """
+
+    __slots__ = ("length", "keys", "values", "nodes", "_text")
+
+    def __init__(self, length: int):
+        self.length = length
+        self.keys: List[str] = []
+        self.values: List[str] = []
+        self.nodes = array("i")
+        self._text: Optional[str] = None
+
+    def add(self, value: str, app_id: str, node: int):
+        key = value + _KEY_SEPARATOR + app_id
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return
+        self.keys.insert(i, key)
+        self.values.insert(i, value)
+        self.nodes.insert(i, node)
+        self._text = None
+
+    def remove(self, value: str, app_id: str):
+        key = value + _KEY_SEPARATOR + app_id
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i], self.values[i], self.nodes[i]
+            self._text = None
+
+    def app_id(self, row: int) -> str:
+        return self.keys[row][self.length + 1:]
+
+    def starting_with(self, needle: str) -> Iterator[int]:
+        """Rows whose value starts with needle, in order."""
+        keys = self.keys
+        row = bisect_left(keys, needle)
+        while row < len(keys) and keys[row].startswith(needle):
+            yield row
+            row += 1
+
+    def runs(self) -> Iterator[Tuple[str, array]]:
+        """Each distinct value with the nodes holding it."""
+        values, start = self.values, 0
+        while start < len(values):
+            end = start + 1
+            while end < len(values) and values[end] == values[start]:
+                end += 1
+            yield values[start], self.nodes[start:end]
+            start = end
+
+    def text(self) -> str:
+        """The values joined for substring search, rebuilt after a change."""
+        if self._text is None:
+            self._text = "\n" + "\n".join(self.values)
+        return self._text
+
+    def containing(self, needle: str) -> Iterator[int]:
+        """Rows containing needle other than at the start, in order."""
+        text, width = self.text(), self.length + 1
+        pos = text.find(needle, 1)
+        while pos >= 0:
+            row, offset = divmod(pos - 1, width)
+            if offset:
+                yield row
+                pos = text.find(needle, 1 + (row + 1) * width)
+            else:
+                pos = text.find(needle, pos + 1)
+
+
+class SearchIndex:
+    """Search over application names, capabilities and APIs, ranked best first.
+
+    The graph's nodes carry their application's first API only; with an
+    ApiIndex the name and endpoint of every API of the application are
+    searched too.
+
+    Normalized field values are kept in buckets of one field and one length,
+    sorted by value. A match scores the same for every value of a bucket
+    (field weight, exact/prefix/substring, query length over value length),
+    so a query visits (bucket, match kind) groups from the highest score down
+    and stops once no later group can enter the top limit. When fewer than
+    limit applications contain the query, the rest are filled with fuzzy
+    matches sharing most of its trigrams, found through a trigram inverted
+    index of node ids. Trigrams shared by more than FUZZY_MAX_POSTINGS nodes
+    keep no postings. Postings only ever grow, so updated nodes leave stale
+    entries that fuzzy matching re-checks against the current values.
+    """
+
+    def __init__(self, graph: GraphIndex, apis: Optional[ApiIndex] = None):
+        self.graph = graph
+        self.apis = apis
+        self._buckets: Dict[str, Dict[int, _Bucket]] = {field: {} for field in NODE_FIELDS}
+        self._postings: Dict[str, array] = {}
+        self._common: set = set()
+        # Normalized (field, value) pairs indexed for each node
+        self._values: List[Tuple[Tuple[str, str], ...]] = []
+
+    def _node_values(self, node: int) -> Tuple[Tuple[str, str], ...]:
+        graph = self.graph
+        values = []
+        for field in NODE_FIELDS:
+            value = normalize(graph.get(node, field))
+            if value:
+                values.append((field, value))
+        if self.apis is not None:
+            for api in self.apis.apis_of(graph.app_id(node)):
+                for field in ("apiName", "apiEndpoint"):
+                    value = normalize(api[field])
+                    if value and (field, value) not in values:
+                        values.append((field, value))
+        return tuple(values)
+
+    def rebuild(self):
+        graph = self.graph
+        # Millions of small tuples and strings; cyclic GC passes over them only slow the build
+        gc.disable()
+        try:
+            self._values = [self._node_values(node) for node in range(len(graph))]
+            rows: Dict[Tuple[str, int], List[Tuple[str, str, int]]] = {}
+            for node, values in enumerate(self._values):
+                app_id = graph.app_id(node)
+                for field, value in values:
+                    rows.setdefault((field, len(value)), []).append((value + _KEY_SEPARATOR + app_id, value, node))
+
+            self._buckets = {field: {} for field in NODE_FIELDS}
+            self._postings, self._common = {}, set()
+            for (field, length), bucket_rows in rows.items():
+                bucket_rows.sort()
+                bucket = self._buckets[field][length] = _Bucket(length)
+                bucket.keys = [row[0] for row in bucket_rows]
+                bucket.values = [row[1] for row in bucket_rows]
+                bucket.nodes = array("i", [row[2] for row in bucket_rows])
+                bucket.text()
+                # Equal values are adjacent, so each one's trigrams are computed once
+                for value, nodes in bucket.runs():
+                    for gram in trigrams(value):
+                        self._post(gram, nodes)
+        finally:
+            gc.enable()
+
+    def _post(self, gram: str, nodes: array):
+        if gram in self._common:
+            return
+        postings = self._postings.get(gram)
+        if postings is None:
+            self._postings[gram] = array("i", nodes)
+        else:
+            postings.extend(nodes)
+            if len(postings) > FUZZY_MAX_POSTINGS:
+                del self._postings[gram]
+                self._common.add(gram)
+
+    def add_nodes(self, nodes: List[dict], edges: List[Tuple[str, str]]):
+        """Write listener: (re)index the written nodes from their merged properties in the graph."""
+        graph = self.graph
+        for node in nodes:
+            self._index(graph.upsert_node(node["applicationId"], node))
+
+    def add_apis(self, apis: List[dict], consumes: List[Tuple[str, str]]):
+        """API write listener: reindex the applications owning the written APIs; runs after apis is updated."""
+        graph = self.graph
+        for app_id in {api["applicationId"] for api in apis}:
+            node = graph.lookup(app_id)
+            if node is not None:
+                self._index(node)
+
+    def _index(self, node: int):
+        while len(self._values) <= node:
+            self._values.append(())
+        values = self._node_values(node)
+        old = self._values[node]
+        if values == old:
+            return
+        app_id = self.graph.app_id(node)
+        for field, value in set(old) - set(values):
+            self._buckets[field][len(value)].remove(value, app_id)
+        for field, value in set(values) - set(old):
+            bucket = self._buckets[field].get(len(value))
+            if bucket is None:
+                bucket = self._buckets[field][len(value)] = _Bucket(len(value))
+            bucket.add(value, app_id, node)
+
+        old_grams = set()
+        for _, value in old:
+            old_grams |= trigrams(value)
+        new_grams = set()
+        for _, value in values:
+            new_grams |= trigrams(value)
+        for gram in new_grams - old_grams:
+            self._post(gram, array("i", [node]))
+        self._values[node] = values
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[dict]:
+        """Up to limit applications matching query, best first; ties go by matched value, then id."""
+        needle = normalize(query)
+        if len(needle) < MIN_QUERY_LENGTH:
+            return []
+        # node -> (-score, matched value, applicationId)
+        ranked = self._exact(needle, limit)
+        if len(ranked) < limit and len(needle) > 2:
+            for node, item in self._fuzzy(needle, limit - len(ranked), ranked):
+                ranked[node] = item
+        results = []
+        for node, (score, _, _) in sorted(ranked.items(), key=lambda entry: entry[1])[:limit]:
+            data = self.graph.node(node)
+            data["score"] = round(-score, 4)
+            results.append(data)
+        return results
+
+    def _exact(self, needle: str, limit: int) -> Dict[int, Tuple[float, str, str]]:
+        """Best nodes with a field containing needle, visiting score groups best first."""
+        n = len(needle)
+        groups = []
+        for field, buckets in self._buckets.items():
+            weight = FIELD_WEIGHTS[field]
+            for length, bucket in buckets.items():
+                # Whole-field matches beat prefixes, which beat substrings; shorter fields rank higher.
+                # The extra 1.0 puts every match containing the query above fuzzy ones
+                if length == n:
+                    groups.append((weight * EXACT + 2.0, False, bucket))
+                elif length > n:
+                    groups.append((weight * PREFIX + n / length + 1.0, False, bucket))
+                    if n > 2:
+                        groups.append((weight * SUBSTRING + n / length + 1.0, True, bucket))
+        groups.sort(key=lambda group: -group[0])
+
+        ranked: Dict[int, Tuple[float, str, str]] = {}
+        for score, substring, bucket in groups:
+            if len(ranked) >= limit and score < -heapq.nsmallest(limit, ranked.values())[-1][0]:
+                break
+            added = 0
+            rows = bucket.containing(needle) if substring else bucket.starting_with(needle)
+            for row in rows:
+                node = bucket.nodes[row]
+                item = (-score, bucket.values[row], bucket.app_id(row))
+                current = ranked.get(node)
+                if current is None:
+                    added += 1
+                elif current <= item:
+                    continue
+                ranked[node] = item
+                # Rows of a group tie on score, so later ones rank below these
+                if added >= limit:
+                    break
+        return ranked
+
+    def _fuzzy(self, needle: str, limit: int,
+               exclude: Dict[int, Tuple[float, str, str]]) -> List[Tuple[int, Tuple[float, str, str]]]:
+        """Up to limit nodes sharing at least MIN_SIMILARITY of needle's trigrams, best first.
+
+        Candidates are counted over the trigrams rare enough to be looked up.
+        The threshold applies to those trigrams only, so a typo in a query
+        made of common words still finds its match. Scores are the share of all
+        the query trigrams a node's current values contain.
+        """
+        grams = trigrams(needle)
+        counted = [gram for gram in grams if gram not in self._common]
+        if not counted:
+            return []
+        counts = Counter()
+        for gram in counted:
+            # A node holding the trigram in several fields is posted once per field
+            counts.update(set(self._postings.get(gram, ())))
+        needed = MIN_SIMILARITY * len(counted)
+        skipped = len(grams) - len(counted)
+
+        found: List[Tuple[Tuple[float, str, str], int]] = []
+        for node, count in counts.most_common():
+            if count < needed:
+                break
+            # A node can at best also contain every skipped trigram
+            if len(found) >= limit and (count + skipped) / len(grams) < -found[limit - 1][0][0]:
+                break
+            if node in exclude:
+                continue
+            current = set()
+            for _, value in self._values[node]:
+                current |= trigrams(value)
+            # Postings can be stale; count only trigrams the node's current values still have
+            if sum(1 for gram in counted if gram in current) < needed:
+                continue
+            score = len(grams & current) / len(grams)
+            found.append(((-score, "", self.graph.app_id(node)), node))
+            found.sort()
+            del found[limit:]
+        return [(node, item) for item, node in found]
+
+    def stats(self) -> dict:
+        return {
+            "applications": len(self._values),
+            "values": sum(len(bucket.keys) for buckets in self._buckets.values() for bucket in buckets.values()),
+            "trigrams": len(self._postings),
+            "commonTrigrams": len(self._common),
+            "postings": sum(len(postings) for postings in self._postings.values()),
+        }
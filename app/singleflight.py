@@ -0,0 +1,87 @@
+import asyncio
+import functools
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.metrics import READ_FLIGHTS
+
+# Longest a request waits for a shared read before giving up
+DEFAULT_MAX_WAIT_SECONDS = 30.0
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) starts fn as a task; callers that
+    arrive while it runs share its result or exception instead of running
+    their own. Each caller waits at most max_wait seconds. The task is shielded,
+    so a caller that is cancelled (e.g. the client disconnected) leaves it
+    running for the others; it is only cancelled once no caller is left
+    waiting. A key is forgotten as soon as its task finishes, so results are
+    never reused beyond the calls that overlapped it.
+    """
+
+    def __init__(self, name: str, max_wait: float = DEFAULT_MAX_WAIT_SECONDS):
+        self.name = name
+        self.max_wait = max_wait
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(functools.partial(self._done, key, flight))
+            self.executions += 1
+            READ_FLIGHTS.inc(group=self.name, outcome="executed")
+        else:
+            self.shared += 1
+            READ_FLIGHTS.inc(group=self.name, outcome="shared")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), self.max_wait)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            READ_FLIGHTS.inc(group=self.name, outcome="timeout")
+            raise
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody wants the result any more; later callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _done(self, key: Hashable, flight: _Flight, task: asyncio.Task):
+        self._forget(key, flight)
+        if not task.cancelled():
+            task.exception()  # retrieved, so a failure nobody awaited is not reported as unhandled
+
+    def stats(self) -> dict:
+        calls = self.executions + self.shared
+        return {
+            "inFlight": len(self._flights),
+            "executions": self.executions,
+            "shared": self.shared,
+            "sharedRatio": round(self.shared / calls, 4) if calls else None,
+            "timeouts": self.timeouts,
+            "maxWaitSeconds": self.max_wait,
+        }
@@ -0,0 +1,233 @@
+import gc
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.api_index import ApiIndex
+from app.changes import CHANGES_PAGE_SIZE, ChangeLog
+from app.graph_index import NODE_FIELDS, GraphIndex, move_name
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SCGSNAP2"
+# magic, graph version, store version (-1 if unknown), nodes, edges, string table bytes, named nodes,
+# APIs, CONSUMES edges, API string table bytes
+HEADER = struct.Struct("<8sqqqqqqqqq")
+# String columns, in table order
+COLUMNS = ("applicationId",) + NODE_FIELDS
+# API string columns, in table order; the apiId is derived from the first two
+API_COLUMNS = ("applicationId", "apiName", "apiEndpoint")
+SEPARATOR = "\x00"
+
+
+class SnapshotError(ValueError):
+    """The file is not a complete snapshot this version can read."""
+
+
+class Snapshot(NamedTuple):
+    graph: GraphIndex
+    apis: ApiIndex
+    version: int
+    # The store's own version the graph and APIs reflected when written, if known
+    store_version: Optional[int]
+    # Named nodes sorted by (applicationName, applicationId) when the snapshot was written
+    order: Sequence[int]
+    # applicationName at that time of each application the replayed changes upserted
+    renamed: Dict[str, Optional[str]]
+
+    def name_keys(self) -> List[Tuple[str, str]]:
+        """Sorted (applicationName, applicationId) pairs of the named applications, without sorting them again."""
+        graph, renamed = self.graph, self.renamed
+        keys = []
+        for node in self.order:
+            app_id = graph.app_id(node)
+            keys.append((renamed[app_id] if app_id in renamed else graph.get(node, "applicationName"), app_id))
+        for app_id, old_name in renamed.items():
+            move_name(keys, app_id, old_name, graph.get(graph.lookup(app_id), "applicationName"))
+        return keys
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _layout(nodes: int, edges: int, strings: int, named: int, apis: int, consumes: int,
+            api_strings: int) -> List[Tuple[int, int]]:
+    """(offset, length) of each section after the header.
+
+    CSR out/in arrays, string table, null mask and name order of the
+    applications, then the string table and null mask of the APIs and the
+    CONSUMES CSR (consumer row to provider rows).
+    """
+    sizes = [8 * (nodes + 1), 4 * edges, 8 * (nodes + 1), 4 * edges, strings, len(COLUMNS) * nodes, 4 * named,
+             api_strings, len(API_COLUMNS) * apis, 8 * (apis + 1), 4 * consumes]
+    sections = []
+    position = _aligned(HEADER.size)
+    for size in sizes:
+        sections.append((position, size))
+        position = _aligned(position + size)
+    return sections
+
+
+def _encode_table(columns: List[list]) -> Tuple[bytes, bytes]:
+    """The string table and null mask of equally long columns."""
+    nulls = bytes(value is None for column in columns for value in column)
+    text = SEPARATOR.join(value or "" for column in columns for value in column)
+    if nulls and text.count(SEPARATOR) != len(nulls) - 1:
+        raise SnapshotError("Snapshot strings must not contain NUL characters")
+    return text.encode("utf-8"), nulls
+
+
+def _decode_table(view: memoryview, strings: Tuple[int, int], nulls: Tuple[int, int],
+                  count: int, width: int) -> List[list]:
+    """width columns of count values from a string table and its null mask."""
+    offset, size = strings
+    values = str(view[offset:offset + size], "utf-8").split(SEPARATOR) if count else []
+    columns = [values[i * count:(i + 1) * count] for i in range(width)]
+    offset, size = nulls
+    for match in re.finditer(b"\x01", view[offset:offset + size]):
+        column, row = divmod(match.start(), count)
+        columns[column][row] = None
+    return columns
+
+
+def write_snapshot(graph: GraphIndex, path: str, version: int = 0, apis: Optional[ApiIndex] = None,
+                   store_version: Optional[int] = None):
+    """Write graph and apis to path atomically, stamped with the change-log and store versions they reflect.
+
+    The file is written next to path, flushed to disk and renamed over it, so
+    readers see either the old snapshot or the complete new one.
+    """
+    if sys.byteorder != "little":
+        raise SnapshotError("Snapshots are little-endian")
+    n = len(graph)
+    out_offsets, out_targets, in_offsets, in_targets = graph.csr()
+    columns = [[graph.app_id(node) for node in range(n)]]
+    columns += [[graph.get(node, field) for node in range(n)] for field in NODE_FIELDS]
+    strings, nulls = _encode_table(columns)
+    ids, names = columns[0], columns[1 + NODE_FIELDS.index("applicationName")]
+    order = array("i", sorted((node for node in range(n) if names[node]), key=lambda node: (names[node], ids[node])))
+
+    rows = list(apis.iter_apis()) if apis is not None else []
+    row_of = {api["apiId"]: row for row, api in enumerate(rows)}
+    api_strings, api_nulls = _encode_table([[api[field] for api in rows] for field in API_COLUMNS])
+    consume_offsets = array("q", [0])
+    consume_targets = array("i")
+    for api in rows:
+        consume_targets.extend(row_of[key] for key in apis.providers(api["apiId"]) if key in row_of)
+        consume_offsets.append(len(consume_targets))
+
+    sections = _layout(n, len(out_targets), len(strings), len(order), len(rows), len(consume_targets),
+                       len(api_strings))
+    data = (out_offsets, out_targets, in_offsets, in_targets, strings, nulls, order,
+            api_strings, api_nulls, consume_offsets, consume_targets)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, version, -1 if store_version is None else store_version, n,
+                                len(out_targets), len(strings), len(order),
+                                len(rows), len(consume_targets), len(api_strings)))
+            for (offset, _), section in zip(sections, data):
+                f.seek(offset)
+                f.write(section)
+            f.truncate(_aligned(sections[-1][0] + sections[-1][1]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """Map the snapshot at path; returns the graph, the API index and their versions.
+
+    The CSR arrays and the name order stay in the mapped file as memoryviews,
+    so only the string tables are decoded; the mapping lives as long as they
+    are used.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < HEADER.size:
+        raise SnapshotError(f"{path} is not a graph snapshot")
+    (magic, version, store_version, n, edges, strings, named,
+     api_count, consumes, api_strings) = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a graph snapshot")
+    sections = _layout(n, edges, strings, named, api_count, consumes, api_strings)
+    if len(mapped) < sections[-1][0] + sections[-1][1]:
+        raise SnapshotError(f"{path} is truncated")
+
+    view = memoryview(mapped)
+    # Millions of small tuples, strings and dicts; cyclic GC passes over them only slow the load
+    gc.disable()
+    try:
+        arrays = [view[offset:offset + size].cast(code)
+                  for (offset, size), code in zip(sections[:4], "qiqi")]
+        columns = _decode_table(view, sections[4], sections[5], n, len(COLUMNS))
+        graph = GraphIndex.from_csr(columns[0], list(zip(*columns[1:])), *arrays)
+        offset, size = sections[6]
+        order = view[offset:offset + size].cast("i")
+
+        apis, keys = ApiIndex.from_columns(*_decode_table(view, sections[7], sections[8], api_count,
+                                                          len(API_COLUMNS)))
+        offsets, targets = [view[offset:offset + size].cast(code)
+                            for (offset, size), code in zip(sections[9:], "qi")]
+        for row, consumer_id in enumerate(keys):
+            if offsets[row] != offsets[row + 1]:
+                for target in targets[offsets[row]:offsets[row + 1]]:
+                    apis.add_consumes(consumer_id, keys[target])
+    finally:
+        gc.enable()
+    return Snapshot(graph, apis, version, None if store_version < 0 else store_version, order, {})
+
+
+def replay(snapshot: Snapshot, changes: ChangeLog) -> int:
+    """Apply the logged changes after the snapshot's version to its graph and APIs; returns how many."""
+    graph, apis, since, _, _, renamed = snapshot
+    applied = 0
+    while True:
+        batch = changes.changes_since(since, CHANGES_PAGE_SIZE)
+        if not batch:
+            return applied
+        for change in batch:
+            op = change["op"]
+            if op == "node":
+                app_id = change["applicationId"]
+                if app_id not in renamed:
+                    node = graph.lookup(app_id)
+                    renamed[app_id] = None if node is None else graph.get(node, "applicationName")
+                graph.upsert_node(app_id, change)
+            elif op == "edge":
+                graph.add_edge(graph.upsert_node(change["upstreamId"]), graph.upsert_node(change["downstreamId"]))
+            elif op == "api":
+                apis.upsert_api(change["applicationId"], change["apiName"], change.get("apiEndpoint"))
+            elif op == "consumes":
+                apis.add_consumes(change["consumerId"], change["providerId"])
+        applied += len(batch)
+        since = batch[-1]["version"]
+
+
+def restore(path: str, changes: ChangeLog) -> Optional[Snapshot]:
+    """The snapshot at path caught up with changes, or None if there is none or the log no longer reaches it."""
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = load_snapshot(path)
+    except SnapshotError:
+        logger.exception("Ignoring unreadable graph snapshot %s", path)
+        return None
+    if not changes.available(snapshot.version):
+        logger.warning("Graph snapshot %s is at version %d, which the change log (versions %d-%d) does not cover",
+                       path, snapshot.version, changes.oldest, changes.version)
+        return None
+    applied = replay(snapshot, changes)
+    logger.info("Restored %d applications and %d APIs from snapshot %s at version %d, then %d changes",
+                len(snapshot.graph), len(snapshot.apis), path, snapshot.version, applied)
+    return snapshot
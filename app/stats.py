@@ -0,0 +1,146 @@
+import heapq
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from app.api_index import ApiIndex
+from app.graph_index import GraphIndex
+
+DEFAULT_TOP = 5
+MAX_TOP = 100
+
+
+class GraphStats:
+    """Degree statistics kept current as writes happen, instead of full-graph degree queries.
+
+    Upstream (in) and downstream (out) PROVIDES_TO degrees are stored per node
+    next to a histogram of each, so counts, min, max and average are O(number
+    of distinct degrees). The most connected applications come from a lazy
+    max-heap: every degree change pushes a fresh entry and stale entries are
+    discarded when the heap is read. With an ApiIndex the API and CONSUMES
+    counts are reported too.
+    """
+
+    def __init__(self, graph: GraphIndex, apis: Optional[ApiIndex] = None):
+        self.graph = graph
+        self.apis = apis
+        self._in = array("i")
+        self._out = array("i")
+        self._in_hist: Dict[int, int] = {}
+        self._out_hist: Dict[int, int] = {}
+        self._heap: List[Tuple[int, int]] = []
+
+    def rebuild(self):
+        graph = self.graph
+        n = len(graph)
+        self._in = array("i", (len(graph.predecessors(node)) for node in range(n)))
+        self._out = array("i", (len(graph.successors(node)) for node in range(n)))
+        self._in_hist = _histogram(self._in)
+        self._out_hist = _histogram(self._out)
+        self._heap = [(-(self._in[node] + self._out[node]), node) for node in range(n)]
+        heapq.heapify(self._heap)
+
+    def add_edges(self, nodes: List[dict], edges: List[Tuple[str, str]]):
+        """Write listener: fold new nodes and edges into the graph and refresh the touched degrees."""
+        graph = self.graph
+        touched = set()
+        for node in nodes:
+            touched.add(graph.upsert_node(node["applicationId"], node))
+        for upstream_id, downstream_id in edges:
+            src = graph.upsert_node(upstream_id)
+            dst = graph.upsert_node(downstream_id)
+            # Idempotent, so the graph may be shared with other listeners or the store
+            graph.add_edge(src, dst)
+            touched.update((src, dst))
+        for node in touched:
+            self._refresh(node)
+        # Drop stale heap entries once they dominate
+        if len(self._heap) > 4 * len(self._in) + 1024:
+            self._heap = [(-(self._in[node] + self._out[node]), node) for node in range(len(self._in))]
+            heapq.heapify(self._heap)
+
+    def add_apis(self, apis: List[dict], consumes: List[Tuple[str, str]]):
+        """API write listener: fold written APIs and CONSUMES edges into the API index."""
+        if self.apis is not None:
+            # Idempotent too, so the index may be the one the store keeps
+            self.apis.add_rows(apis, consumes)
+
+    def _refresh(self, node: int):
+        while len(self._in) <= node:
+            heapq.heappush(self._heap, (0, len(self._in)))
+            self._in.append(0)
+            self._out.append(0)
+            _move(self._in_hist, None, 0)
+            _move(self._out_hist, None, 0)
+        in_degree = len(self.graph.predecessors(node))
+        out_degree = len(self.graph.successors(node))
+        if in_degree == self._in[node] and out_degree == self._out[node]:
+            return
+        _move(self._in_hist, self._in[node], in_degree)
+        _move(self._out_hist, self._out[node], out_degree)
+        self._in[node] = in_degree
+        self._out[node] = out_degree
+        heapq.heappush(self._heap, (-(in_degree + out_degree), node))
+
+    def top(self, k: int = DEFAULT_TOP) -> List[int]:
+        """The k nodes with the most upstream plus downstream connections."""
+        found: List[Tuple[int, int]] = []
+        seen = set()
+        while self._heap and len(found) < k:
+            entry = heapq.heappop(self._heap)
+            total, node = -entry[0], entry[1]
+            if node in seen or total != self._in[node] + self._out[node]:
+                continue  # stale or duplicate
+            seen.add(node)
+            found.append(entry)
+        for entry in found:
+            heapq.heappush(self._heap, entry)
+        return [node for _, node in found]
+
+    def summary(self, top: int = DEFAULT_TOP) -> dict:
+        count = len(self._in)
+        edges = sum(degree * nodes for degree, nodes in self._out_hist.items())
+        graph = self.graph
+        summary = {
+            "applications": count,
+            "relationships": edges,
+            "upstream": _aggregate(self._in_hist, edges, count),
+            "downstream": _aggregate(self._out_hist, edges, count),
+            "topConnected": [
+                {
+                    "applicationId": graph.app_id(node),
+                    "applicationName": graph.get(node, "applicationName"),
+                    "upstream": self._in[node],
+                    "downstream": self._out[node],
+                    "total": self._in[node] + self._out[node],
+                }
+                for node in self.top(top)
+            ],
+        }
+        if self.apis is not None:
+            summary["apis"] = len(self.apis)
+            summary["apiConsumes"] = self.apis.edge_count
+        return summary
+
+
+def _histogram(degrees: array) -> Dict[int, int]:
+    hist: Dict[int, int] = {}
+    for degree in degrees:
+        hist[degree] = hist.get(degree, 0) + 1
+    return hist
+
+
+def _move(hist: Dict[int, int], old, new: int):
+    """Move one node from degree old (None for a new node) to degree new."""
+    if old is not None:
+        hist[old] -= 1
+        if not hist[old]:
+            del hist[old]
+    hist[new] = hist.get(new, 0) + 1
+
+
+def _aggregate(hist: Dict[int, int], edges: int, count: int) -> dict:
+    return {
+        "min": min(hist, default=0),
+        "max": max(hist, default=0),
+        "avg": round(edges / count, 4) if count else 0.0,
+    }
@@ -0,0 +1,182 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+DIRECTIONS = ("both", "upstream", "downstream")
+
+# Server-side bounds for the per-request traversal parameters
+MAX_DEPTH = 10
+DEFAULT_MAX_NODES = 1000
+MAX_NODES_LIMIT = 10000
+DEFAULT_MAX_EDGES = 5000
+MAX_EDGES_LIMIT = 50000
+# Roots accepted by one multi-root traversal
+MAX_ROOTS = 1000
+
+# expand(upstreamFrontier, downstreamFrontier, limit) -> [(direction, source, target, neighbor)]
+# where neighbor is the {applicationId, applicationName} summary of the node reached (for
+# API lineage, the API summary, identified by apiId)
+Expand = Callable[[List[str], List[str], int], Awaitable[List[Tuple[str, str, str, dict]]]]
+
+
+async def frontier_bfs(expand: Expand, root: str, depth: int = 1, direction: str = "both",
+                       max_nodes: int = DEFAULT_MAX_NODES, max_edges: int = DEFAULT_MAX_EDGES,
+                       key: str = "applicationId") -> dict:
+    """Level-synchronous BFS over PROVIDES_TO (or, via expand, any edge type) from root.
+
+    Each hop expands the whole upstream and downstream frontier with one batched
+    expand() call. Traversal stops at depth hops or as soon as max_nodes distinct
+    nodes (root included) or max_edges edges have been collected, in which case
+    the result is flagged as truncated. Nodes are identified by their key field.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+
+    reached: Dict[str, Dict[str, dict]] = {"upstream": {}, "downstream": {}}
+    frontiers = {
+        "upstream": [root] if direction in ("both", "upstream") else [],
+        "downstream": [root] if direction in ("both", "downstream") else [],
+    }
+    all_nodes = {root}
+    edges: List[dict] = []
+    edge_keys = set()
+    truncated = False
+
+    level = 0
+    while level < depth and (frontiers["upstream"] or frontiers["downstream"]) and not truncated:
+        level += 1
+        remaining = max_edges - len(edges)
+        found = await expand(frontiers["upstream"], frontiers["downstream"], remaining + 1)
+        if len(found) > remaining:
+            truncated = True
+
+        next_frontiers = {"upstream": [], "downstream": []}
+        for side, source, target, neighbor in found:
+            node_id = neighbor[key]
+            side_nodes = reached[side]
+            if node_id != root and node_id not in side_nodes:
+                if node_id not in all_nodes and len(all_nodes) >= max_nodes:
+                    truncated = True
+                    continue
+                all_nodes.add(node_id)
+                side_nodes[node_id] = dict(neighbor, depth=level)
+                next_frontiers[side].append(node_id)
+
+            if (source, target) not in edge_keys:
+                if len(edges) >= max_edges:
+                    truncated = True
+                    break
+                edge_keys.add((source, target))
+                edges.append({"source": source, "target": target})
+        frontiers = next_frontiers
+
+    return {
+        "upstreamApps": list(reached["upstream"].values()),
+        "downstreamApps": list(reached["downstream"].values()),
+        "edges": edges,
+        "depth": depth,
+        "direction": direction,
+        "truncated": truncated,
+    }
+
+
+def _bit_indexes(bits: int) -> List[int]:
+    indexes = []
+    while bits:
+        low = bits & -bits
+        indexes.append(low.bit_length() - 1)
+        bits ^= low
+    return indexes
+
+
+async def multi_root_bfs(expand: Expand, roots: List[str], depth: int = 1, direction: str = "both",
+                         max_nodes: int = DEFAULT_MAX_NODES, max_edges: int = DEFAULT_MAX_EDGES,
+                         membership: bool = False, root_nodes: Optional[Dict[str, dict]] = None) -> dict:
+    """Union of the supply chains of all roots, from one level-synchronous BFS.
+
+    Every hop expands the frontier of all roots with one batched expand() call,
+    and each node is expanded at most once per direction however many roots
+    reach it. With membership, each node carries a bitmask of the roots it is
+    upstream or downstream of (bit i for roots[i]). A node whose mask gains bits
+    at a later hop passes them on over the adjacency already fetched, without
+    querying the store again. depth is the node's distance from the nearest
+    root. max_nodes (roots included) and max_edges bound the union, as in
+    frontier_bfs. root_nodes maps a root to its node summary.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+
+    sides = [side for side in ("upstream", "downstream") if direction in ("both", side)]
+    root_nodes = root_nodes or {}
+    nodes: Dict[str, dict] = {}
+    for root in roots:
+        nodes.setdefault(root, dict(root_nodes.get(root) or {"applicationId": root}, depth=0))
+    # side -> node -> bitmask of the roots that reach it on that side
+    masks: Dict[str, Dict[str, int]] = {side: {} for side in sides}
+    # side -> node -> bits reached at the previous hop, still to pass on
+    pending: Dict[str, Dict[str, int]] = {side: {} for side in sides}
+    for i, root in enumerate(roots):
+        bit = 1 << i if membership else 1
+        for side in sides:
+            masks[side][root] = masks[side].get(root, 0) | bit
+            pending[side][root] = pending[side].get(root, 0) | bit
+    # side -> expanded node -> neighbor ids on that side
+    adjacency: Dict[str, Dict[str, List[str]]] = {side: {} for side in sides}
+    edges: List[dict] = []
+    edge_keys = set()
+    truncated = False
+
+    level = 0
+    while level < depth and any(pending.values()) and not truncated:
+        level += 1
+        fetch = {side: [node for node in pending.get(side, ()) if node not in adjacency[side]]
+                 for side in ("upstream", "downstream")}
+        if fetch["upstream"] or fetch["downstream"]:
+            remaining = max_edges - len(edges)
+            found = await expand(fetch["upstream"], fetch["downstream"], remaining + 1)
+            if len(found) > remaining:
+                truncated = True
+            for side in sides:
+                for node in fetch[side]:
+                    adjacency[side][node] = []
+            for side, source, target, neighbor in found:
+                node_id = neighbor["applicationId"]
+                adjacency[side][target if side == "upstream" else source].append(node_id)
+                if node_id not in nodes:
+                    if len(nodes) >= max_nodes:
+                        truncated = True
+                        continue
+                    nodes[node_id] = dict(neighbor, depth=level)
+                if (source, target) not in edge_keys:
+                    if len(edges) >= max_edges:
+                        truncated = True
+                        break
+                    edge_keys.add((source, target))
+                    edges.append({"source": source, "target": target})
+
+        next_pending: Dict[str, Dict[str, int]] = {side: {} for side in sides}
+        for side in sides:
+            side_masks = masks[side]
+            for node, bits in pending[side].items():
+                for neighbor_id in adjacency[side].get(node, ()):
+                    if neighbor_id not in nodes:
+                        continue
+                    new_bits = bits & ~side_masks.get(neighbor_id, 0)
+                    if new_bits:
+                        side_masks[neighbor_id] = side_masks.get(neighbor_id, 0) | new_bits
+                        next_pending[side][neighbor_id] = next_pending[side].get(neighbor_id, 0) | new_bits
+        pending = next_pending
+
+    if membership:
+        own_bits = {root: 1 << i for i, root in enumerate(roots)}
+        for side in sides:
+            for node_id, node in nodes.items():
+                bits = masks[side].get(node_id, 0) & ~own_bits.get(node_id, 0)
+                node[f"{side}Of"] = _bit_indexes(bits)
+
+    return {
+        "roots": roots,
+        "nodes": list(nodes.values()),
+        "edges": edges,
+        "depth": depth,
+        "direction": direction,
+        "truncated": truncated,
+    }
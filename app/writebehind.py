@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.models import Application
+
+logger = logging.getLogger(__name__)
+
+# Distinct applications queued but not yet written before submit() pushes back
+DEFAULT_MAX_PENDING = 10000
+# Registrations merged into one queued application before submit() pushes back on it
+DEFAULT_MAX_MERGES = 100
+DEFAULT_BATCH_SIZE = 500
+# Longest a registration waits for its batch to fill
+DEFAULT_FLUSH_SECONDS = 0.5
+# Finished tickets kept for status lookups
+DEFAULT_MAX_TICKETS = 100000
+
+
+class QueueFull(Exception):
+    """The write-behind queue is full or shutting down; retry later."""
+
+
+def merge_applications(older: Application, newer: Application) -> Application:
+    """One registration with the effect of writing older and then newer.
+
+    Writes MERGE, so newer's properties win while relationships and APIs
+    accumulate; on a clash the newer neighbor name or API endpoint wins. If
+    newer declares no API, older's first API stays the primary one.
+    """
+    def union(old, new, key):
+        merged = {key(item): item for item in old}
+        merged.update((key(item), item) for item in new)
+        return list(merged.values())
+
+    apis = {api.apiName: api for api in older.exposed_apis()}
+    merged_apis = []
+    # newer's APIs first, so its first API stays the application's primary one
+    for api in newer.exposed_apis():
+        old = apis.pop(api.apiName, None)
+        if old is not None:
+            api = api.model_copy(update={"consumes": union(old.consumes, api.consumes,
+                                                           lambda ref: (ref.appId, ref.apiName))})
+        merged_apis.append(api)
+    merged_apis.extend(apis.values())
+
+    return newer.model_copy(update={
+        "apis": merged_apis,
+        "upstreamApps": union(older.upstreamApps, newer.upstreamApps, lambda rel: rel.appId),
+        "downstreamApps": union(older.downstreamApps, newer.downstreamApps, lambda rel: rel.appId),
+    })
+
+
+class WriteBehindQueue:
+    """Acknowledges registrations immediately and writes them to the store in batches.
+
+    submit() takes a validated Application, queues it and returns a ticket
+    without touching the store. Registrations of an applicationId that is
+    still queued are merged into it, so a burst of deploys of one application
+    costs one write. A single worker flushes up to
+    batch_size applications per create_applications() call once that many are
+    queued or flush_interval seconds have passed. Tickets move from queued to
+    written or failed. New applications count against max_pending; merging
+    into a queued one is refused after max_merges registrations, so one busy
+    applicationId cannot grow the queue while the store is stalled. close()
+    stops accepting and drains the queue.
+    """
+
+    def __init__(self, store, max_pending: int = DEFAULT_MAX_PENDING, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_SECONDS, max_tickets: int = DEFAULT_MAX_TICKETS,
+                 max_merges: int = DEFAULT_MAX_MERGES):
+        self.store = store
+        self.max_pending = max_pending
+        self.max_merges = max_merges
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_tickets = max_tickets
+        # applicationId -> (merged application, its queued ticket ids), oldest first
+        self._pending: "OrderedDict[str, Tuple[Application, List[str]]]" = OrderedDict()
+        self._tickets: "OrderedDict[str, dict]" = OrderedDict()
+        self._queued = 0
+        self._has_pending = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._closing = False
+        self._worker: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        self._closing = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop accepting registrations and wait until every queued one is written."""
+        self._closing = True
+        self._has_pending.set()
+        self._batch_ready.set()
+        if self._worker is not None:
+            await self._worker
+            self._worker = None
+
+    def submit(self, app: Application) -> dict:
+        """Queue app and return its ticket; raises QueueFull when the queue cannot take it."""
+        queued = self._pending.get(app.applicationId)
+        if self._closing or self._worker is None:
+            self.rejected += 1
+            raise QueueFull("Shutting down" if self._closing else "Write queue is not running")
+        if queued is None and len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise QueueFull("Write queue is full")
+        if queued is not None and len(queued[1]) >= self.max_merges:
+            self.rejected += 1
+            raise QueueFull(f"Too many queued registrations of {app.applicationId}")
+        ticket = {
+            "ticket": uuid.uuid4().hex,
+            "applicationId": app.applicationId,
+            "status": "queued",
+            "submittedAt": time.time(),
+            "completedAt": None,
+            "error": None,
+        }
+        if queued is None:
+            self._pending[app.applicationId] = (app, [ticket["ticket"]])
+        else:
+            self._pending[app.applicationId] = (merge_applications(queued[0], app), queued[1] + [ticket["ticket"]])
+            self.coalesced += 1
+        self._tickets[ticket["ticket"]] = ticket
+        self._trim_tickets()
+        self._queued += 1
+        self.submitted += 1
+        self._has_pending.set()
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+        return ticket
+
+    def ticket(self, ticket_id: str) -> Optional[dict]:
+        return self._tickets.get(ticket_id)
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._has_pending.clear()
+                await self._has_pending.wait()
+                continue
+            if len(self._pending) < self.batch_size and not self._closing:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush()
+
+    async def _flush(self):
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popitem(last=False)[1])
+        try:
+            errors = dict(await self.store.create_applications([app for app, _ in batch], self.batch_size))
+        except Exception as e:
+            logger.exception("Error flushing queued applications")
+            errors = {i: str(e) for i in range(len(batch))}
+        self.flushes += 1
+
+        completed_at = time.time()
+        for i, (app, ticket_ids) in enumerate(batch):
+            error = errors.get(i)
+            if error is None:
+                self.written += 1
+            else:
+                self.failed += 1
+            for ticket_id in ticket_ids:
+                ticket = self._tickets.get(ticket_id)
+                if ticket is not None:
+                    ticket.update(status="failed" if error else "written", completedAt=completed_at, error=error)
+            self._queued -= len(ticket_ids)
+
+    def _trim_tickets(self):
+        # Forget the oldest finished tickets; queued ones stay until their batch is written
+        while len(self._tickets) > self.max_tickets:
+            oldest = next(iter(self._tickets.values()))
+            if oldest["status"] == "queued":
+                break
+            self._tickets.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "queuedTickets": self._queued,
+            "queuedApplications": len(self._pending),
+            "maxPending": self.max_pending,
+            "maxMerges": self.max_merges,
+            "batchSize": self.batch_size,
+            "flushIntervalSeconds": self.flush_interval,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,314 @@
+"""HTTP load benchmark for the supply-chain API.
+
+Seeds a synthetic graph from TestData.generate_graph through the bulk endpoint,
+then drives a weighted mix of list, supply-chain, api-supply-chain and create
+requests from concurrent clients and reports throughput and p50/p95/p99 latency
+per endpoint. By default the FastAPI app runs in process on the memory backend;
+--url points the benchmark at a running server instead.
+
+    python benchmark.py --apps 20000 --concurrency 32 --duration 30 --out results.json
+    python benchmark.py --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from TestData import DEGREE_DISTRIBUTIONS, generate_graph
+
+ENDPOINTS = ('list', 'supply-chain', 'api-supply-chain', 'create')
+DEFAULT_MIX = 'list=3,supply-chain=4,api-supply-chain=2,create=1'
+DEFAULT_TOLERANCE = 0.2
+SEED_CHUNK_SIZE = 1000
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(text):
+    """Parse 'endpoint=weight,...' into a dict of positive weights."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix; expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def application_payloads(graph):
+    """Application payloads for the bulk endpoint; each edge is sent once, as an upstreamApps entry."""
+    ids = graph['applicationId'].tolist()
+    names = graph['applicationName'].tolist()
+    upstream_of = [[] for _ in ids]
+    for up, down in zip(graph['upstream'].tolist(), graph['downstream'].tolist()):
+        upstream_of[down].append({'appId': ids[up], 'appName': names[up]})
+    columns = [graph[field].tolist() for field in ('capabilityName', 'apiName', 'apiEndpoint')]
+    return [
+        {
+            'applicationId': ids[i],
+            'applicationName': names[i],
+            'capabilityName': capability,
+            'apiName': api_name,
+            'apiEndpoint': endpoint,
+            'upstreamApps': upstream_of[i],
+            'downstreamApps': [],
+        }
+        for i, (capability, api_name, endpoint) in enumerate(zip(*columns))
+    ]
+
+
+async def seed(client, graph):
+    payloads = application_payloads(graph)
+    print(f"Seeding {len(payloads):,} applications...")
+    started = time.perf_counter()
+    for start in range(0, len(payloads), SEED_CHUNK_SIZE):
+        response = await client.post('/api/applications/bulk', json=payloads[start:start + SEED_CHUNK_SIZE])
+        response.raise_for_status()
+        report = response.json()
+        if report['failed']:
+            raise RuntimeError(f"Seeding failed: {report['errors'][:3]}")
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    return [
+        {'applicationId': app['applicationId'], 'applicationName': app['applicationName'], 'apiName': app['apiName']}
+        for app in payloads
+    ]
+
+
+async def sample_applications(client, sample_size):
+    """Collect up to sample_size existing applications from the listing endpoint."""
+    apps = []
+    after = None
+    while len(apps) < sample_size:
+        params = {'limit': min(500, sample_size - len(apps))}
+        if after:
+            params['after'] = after
+        response = await client.get('/api/applications', params=params)
+        response.raise_for_status()
+        page = response.json()
+        apps.extend(page['items'])
+        after = page['nextCursor']
+        if not after:
+            break
+    if not apps:
+        raise RuntimeError("No applications found; run without --no-seed")
+    return apps
+
+
+class Workload:
+    """Builds one request of each endpoint type from the sampled applications."""
+
+    def __init__(self, apps, depth):
+        self.apps = apps
+        self.depth = depth
+        self.created = 0
+
+    def request(self, endpoint, rng):
+        app = rng.choice(self.apps)
+        app_id = app['applicationId']
+        if endpoint == 'list':
+            # Alternate between the first page and a name-prefix search
+            params = {'limit': 50}
+            if rng.random() < 0.5 and app.get('applicationName'):
+                params['q'] = app['applicationName'][:4]
+            return 'GET', '/api/applications', {'params': params}
+        if endpoint == 'supply-chain':
+            return 'GET', f'/api/applications/{app_id}/supply-chain', {'params': {'depth': self.depth}}
+        if endpoint == 'api-supply-chain':
+            return ('GET', f'/api/applications/{app_id}/api-supply-chain',
+                    {'params': {'apiName': app.get('apiName') or ''}})
+
+        self.created += 1
+        new_id = f"BENCH{self.created:07d}"
+        upstream, downstream = rng.choice(self.apps), rng.choice(self.apps)
+        payload = {
+            'applicationId': new_id,
+            'applicationName': f"Bench{new_id}",
+            'capabilityName': 'Capability_BENCH',
+            'apiName': 'API_BENCH',
+            'apiEndpoint': f'/api/v1/{new_id}',
+            'upstreamApps': [{'appId': upstream['applicationId'], 'appName': upstream['applicationName']}],
+            'downstreamApps': [{'appId': downstream['applicationId'], 'appName': downstream['applicationName']}],
+        }
+        return 'POST', '/api/applications', {'json': payload}
+
+
+async def client_loop(client, workload, mix, deadline, samples, rng):
+    endpoints = list(mix)
+    weights = list(mix.values())
+    while time.perf_counter() < deadline:
+        endpoint = rng.choices(endpoints, weights)[0]
+        method, url, kwargs = workload.request(endpoint, rng)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples[endpoint].append((time.perf_counter() - started, ok))
+
+
+async def drive(client, workload, mix, concurrency, duration, seed):
+    samples = {endpoint: [] for endpoint in mix}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client_loop(client, workload, mix, deadline, samples, random.Random(f"{seed}-{i}"))
+        for i in range(concurrency)
+    ))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    """Throughput, error count and latency percentiles (milliseconds) per endpoint."""
+    endpoints = {}
+    for endpoint, rows in samples.items():
+        if not rows:
+            continue
+        latencies = np.array([latency for latency, _ in rows]) * 1000
+        p50, p95, p99 = np.percentile(latencies, PERCENTILES)
+        endpoints[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(1 for _, ok in rows if not ok),
+            'throughput': round(len(rows) / elapsed, 1),
+            'meanMs': round(float(latencies.mean()), 3),
+            'p50Ms': round(float(p50), 3),
+            'p95Ms': round(float(p95), 3),
+            'p99Ms': round(float(p99), 3),
+        }
+    total = sum(row['requests'] for row in endpoints.values())
+    return {
+        'elapsedSeconds': round(elapsed, 3),
+        'requests': total,
+        'throughput': round(total / elapsed, 1) if elapsed else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Regressions of result against baseline: p95/p99 latency up or throughput down by more than tolerance."""
+    regressions = []
+    for endpoint, current in result['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if previous is None:
+            continue
+        for metric in ('p95Ms', 'p99Ms'):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{endpoint} {metric}: {previous[metric]} -> {current[metric]}")
+        if previous['throughput'] and current['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(f"{endpoint} throughput: {previous['throughput']} -> {current['throughput']}")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{endpoint} errors: {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def print_summary(result):
+    print(f"\n{'endpoint':<18}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in result['endpoints'].items():
+        print(f"{endpoint:<18}{row['requests']:>10,}{row['errors']:>8,}{row['throughput']:>10,.1f}"
+              f"{row['p50Ms']:>10.2f}{row['p95Ms']:>10.2f}{row['p99Ms']:>10.2f}")
+    print(f"\nTotal: {result['requests']:,} requests in {result['elapsedSeconds']:.1f}s "
+          f"({result['throughput']:,.1f} req/s)")
+
+
+async def run(args, client):
+    if args.no_seed:
+        apps = await sample_applications(client, args.sample)
+    else:
+        graph = generate_graph(num_apps=args.apps, min_connections=args.min_connections,
+                               distribution=args.distribution, extra_edges_per_app=args.extra_edges,
+                               seed=args.seed)
+        apps = await seed(client, graph)
+
+    mix = parse_mix(args.mix)
+    workload = Workload(apps, args.depth)
+    if args.warmup:
+        print(f"Warming up for {args.warmup}s...")
+        await drive(client, workload, mix, args.concurrency, args.warmup, f"{args.seed}-warmup")
+
+    print(f"Running {args.concurrency} clients for {args.duration}s with mix {args.mix}...")
+    samples, elapsed = await drive(client, workload, mix, args.concurrency, args.duration, args.seed)
+    result = summarize(samples, elapsed)
+    result['config'] = {
+        'target': args.url or f"in-process ({os.environ.get('GRAPH_BACKEND')})",
+        'apps': None if args.no_seed else args.apps,
+        'minConnections': args.min_connections,
+        'distribution': args.distribution,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'depth': args.depth,
+        'mix': mix,
+        'seed': args.seed,
+    }
+    return result
+
+
+async def run_in_process(args):
+    # The store is picked when app.main is imported, so the backend must be set first
+    os.environ.setdefault('GRAPH_BACKEND', 'memory')
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://benchmark', timeout=None) as client:
+            return await run(args, client)
+
+
+async def run_remote(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        return await run(args, client)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the supply-chain API.")
+    parser.add_argument('--url', help="benchmark a running server instead of the in-process app")
+    parser.add_argument('--no-seed', action='store_true',
+                        help="use the applications already stored instead of seeding a generated graph")
+    parser.add_argument('--sample', type=int, default=2000, help="applications sampled with --no-seed")
+    parser.add_argument('--apps', type=int, default=5000, help="applications to seed")
+    parser.add_argument('--min-connections', type=int, default=5)
+    parser.add_argument('--distribution', choices=DEGREE_DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--extra-edges', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42, help="seed for the graph and the request mix")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="weighted endpoint mix, e.g. 'list=1,supply-chain=3'")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent clients")
+    parser.add_argument('--duration', type=float, default=10.0, help="measured seconds")
+    parser.add_argument('--warmup', type=float, default=2.0, help="unmeasured seconds before the run")
+    parser.add_argument('--depth', type=int, default=2, help="supply-chain traversal depth")
+    parser.add_argument('--out', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="compare against a previous --out file and flag regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative change before a metric counts as a regression")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    result = asyncio.run(run_remote(args) if args.url else run_in_process(args))
+    print_summary(result)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,97 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from py2neo import Graph, Node, Relationship
-from typing import List, Optional
+from py2neo import Graph
+from typing import List
 import logging
 
+from models import Application
+
 app = FastAPI()
 graph = Graph("bolt://localhost:7687", auth=("neo4j", "password"))
 logging.basicConfig(level=logging.INFO)
 
-# Data Model
-class Application(BaseModel):
-    application_id: str
-    application_name: str
-    capability_name: str
-    api_name: str
-    api_endpoint: str
-    upstream_applications: Optional[List[str]] = []
-    downstream_applications: Optional[List[str]] = []
+# Upsert a batch of applications in one statement. Every node is merged before
+# any edge is touched, so applications in the same batch can reference each
+# other; each listed application's FEEDS_INTO edges are then replaced by the
+# declared ones. Neighbor ids that match no application are returned.
+UPSERT_APPLICATIONS_QUERY = """
+UNWIND $apps AS app
+MERGE (a:Application {application_id: app.application_id})
+SET a.application_name = app.application_name,
+    a.capability_name = app.capability_name,
+    a.api_name = app.api_name,
+    a.api_endpoint = app.api_endpoint
+WITH collect(a) AS nodes, collect(app) AS apps
+CALL {
+    WITH nodes
+    UNWIND nodes AS n
+    MATCH (n)-[r:FEEDS_INTO]-()
+    DELETE r
+}
+UNWIND apps AS app
+MATCH (a:Application {application_id: app.application_id})
+CALL {
+    WITH a, app
+    UNWIND app.upstream_applications AS upstream_id
+    MATCH (u:Application {application_id: upstream_id})
+    MERGE (u)-[:FEEDS_INTO]->(a)
+}
+CALL {
+    WITH a, app
+    UNWIND app.downstream_applications AS downstream_id
+    MATCH (d:Application {application_id: downstream_id})
+    MERGE (a)-[:FEEDS_INTO]->(d)
+}
+CALL {
+    WITH app
+    UNWIND app.upstream_applications AS upstream_id
+    OPTIONAL MATCH (u:Application {application_id: upstream_id})
+    WITH upstream_id WHERE u IS NULL
+    RETURN collect(upstream_id) AS missing_upstream
+}
+CALL {
+    WITH app
+    UNWIND app.downstream_applications AS downstream_id
+    OPTIONAL MATCH (d:Application {application_id: downstream_id})
+    WITH downstream_id WHERE d IS NULL
+    RETURN collect(downstream_id) AS missing_downstream
+}
+RETURN app.application_id AS application_id, missing_upstream, missing_downstream
+"""
+
 
-# Helper function to create/update application node
-def upsert_application(tx, app: Application):
-    node = Node("Application",
-                application_id=app.application_id,
-                application_name=app.application_name,
-                capability_name=app.capability_name,
-                api_name=app.api_name,
-                api_endpoint=app.api_endpoint)
-    tx.merge(node, "Application", "application_id")
-    return node
+# Helper function to create/update applications and their relationships in one round trip
+def upsert_applications(apps: List[Application]) -> List[dict]:
+    rows = [dict(app.dict(),
+                 upstream_applications=app.upstream_applications or [],
+                 downstream_applications=app.downstream_applications or [])
+            for app in apps]
+    results = graph.run(UPSERT_APPLICATIONS_QUERY, apps=rows).data()
+    for result in results:
+        for upstream_id in result["missing_upstream"]:
+            logging.warning(f"Upstream app {upstream_id} not found.")
+        for downstream_id in result["missing_downstream"]:
+            logging.warning(f"Downstream app {downstream_id} not found.")
+    return results
 
 # Use Case 1: Create/Update Application
 @app.post("/applications")
 async def create_application(app: Application):
     try:
-        tx = graph.begin()
-        app_node = upsert_application(tx, app)
-
-        # Clear existing relationships
-        tx.run("MATCH (a:Application {application_id: $app_id})-[r:FEEDS_INTO]->() DELETE r", app_id=app.application_id)
-        tx.run("MATCH (a:Application {application_id: $app_id})<-[r:FEEDS_INTO]-() DELETE r", app_id=app.application_id)
-
-        # Add upstream relationships
-        for upstream_id in app.upstream_applications:
-            upstream_node = graph.nodes.match("Application", application_id=upstream_id).first()
-            if upstream_node:
-                tx.create(Relationship(upstream_node, "FEEDS_INTO", app_node))
-            else:
-                logging.warning(f"Upstream app {upstream_id} not found.")
-
-        # Add downstream relationships
-        for downstream_id in app.downstream_applications:
-            downstream_node = graph.nodes.match("Application", application_id=downstream_id).first()
-            if downstream_node:
-                tx.create(Relationship(app_node, "FEEDS_INTO", downstream_node))
-            else:
-                logging.warning(f"Downstream app {downstream_id} not found.")
+        result = upsert_applications([app])[0]
+        return {
+            "message": f"Application {app.application_id} created/updated",
+            "missing_upstream": result["missing_upstream"],
+            "missing_downstream": result["missing_downstream"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        tx.commit()
-        return {"message": f"Application {app.application_id} created/updated"}
+# Create/Update many applications in one transaction
+@app.post("/applications/batch")
+async def create_applications(apps: List[Application]):
+    try:
+        results = upsert_applications(apps)
+        return {"message": f"{len(apps)} applications created/updated", "applications": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
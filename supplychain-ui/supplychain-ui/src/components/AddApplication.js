@@ -17,8 +17,12 @@ import DeleteIcon from '@mui/icons-material/Delete';
 import AddIcon from '@mui/icons-material/Add';
 import axios from 'axios';
 
+const PAGE_SIZE = 50;
+const SEARCH_DEBOUNCE_MS = 250;
+
 const AddApplication = () => {
   const [applications, setApplications] = useState([]);
+  const [searchText, setSearchText] = useState('');
   const [formData, setFormData] = useState({
     applicationId: '',
     applicationName: '',
@@ -62,14 +66,18 @@ const AddApplication = () => {
     'Calculate'
   ];
 
+  // Typeahead for the upstream/downstream pickers
   useEffect(() => {
-    fetchApplications();
-  }, []);
+    const timer = setTimeout(() => fetchApplications(searchText), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchText]);
 
-  const fetchApplications = async () => {
+  const fetchApplications = async (query) => {
     try {
-      const response = await axios.get('http://localhost:5000/api/applications');
-      setApplications(response.data);
+      const response = await axios.get('http://localhost:5000/api/applications', {
+        params: { q: query || undefined, limit: PAGE_SIZE }
+      });
+      setApplications(response.data.items);
     } catch (error) {
       console.error('Error fetching applications:', error);
     }
@@ -141,7 +149,7 @@ const AddApplication = () => {
         upstreamApps: [],
         downstreamApps: []
       });
-      fetchApplications(); // Refresh applications list
+      fetchApplications(searchText); // Refresh applications list
     } catch (error) {
       setNotification({
         open: true,
@@ -267,6 +275,10 @@ const AddApplication = () => {
               <Autocomplete
                 multiple
                 options={applications}
+                filterOptions={(options) => options}
+                onInputChange={(event, value, reason) => {
+                  if (reason === 'input') setSearchText(value);
+                }}
                 getOptionLabel={(option) => {
                   if (typeof option === 'string') return option;
                   return option.applicationName || option.appName || '';
@@ -321,6 +333,10 @@ const AddApplication = () => {
               <Autocomplete
                 multiple
                 options={applications}
+                filterOptions={(options) => options}
+                onInputChange={(event, value, reason) => {
+                  if (reason === 'input') setSearchText(value);
+                }}
                 getOptionLabel={(option) => {
                   if (typeof option === 'string') return option;
                   return option.applicationName || option.appName || '';
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import ReactFlow, {
   Background,
   Controls,
@@ -12,10 +12,8 @@ import {
   Container,
   Paper,
   Typography,
-  FormControl,
-  InputLabel,
-  Select,
-  MenuItem,
+  Autocomplete,
+  TextField,
   Breadcrumbs,
   Link,
   Divider,
@@ -23,33 +21,33 @@ import {
 import NavigateNextIcon from '@mui/icons-material/NavigateNext';
 import axios from 'axios';
 
+const PAGE_SIZE = 50;
+const SEARCH_DEBOUNCE_MS = 250;
+
 const SupplyChainView = () => {
   const [applications, setApplications] = useState([]);
+  const [searchText, setSearchText] = useState('');
   const [selectedApp, setSelectedApp] = useState('');
   const [currentApp, setCurrentApp] = useState(null);
   const [nodes, setNodes, onNodesChange] = useNodesState([]);
   const [edges, setEdges, onEdgesChange] = useEdgesState([]);
   const [navigationHistory, setNavigationHistory] = useState([]);
+  // Last response and ETag per application, revalidated with If-None-Match
+  const supplyChainCache = useRef(new Map());
 
+  // Typeahead: fetch one page of name matches once the user stops typing
   useEffect(() => {
-    fetchApplications();
-  }, []);
+    const timer = setTimeout(() => fetchApplications(searchText), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchText]);
 
-  const fetchApplications = async () => {
+  const fetchApplications = async (query) => {
     try {
-      const response = await axios.get('http://localhost:5000/api/applications');
-      const uniqueApps = response.data.reduce((acc, current) => {
-        const x = acc.find(item => item.applicationId === current.applicationId);
-        if (!x && current.applicationName) {  // Only add if name exists
-          return acc.concat([current]);
-        }
-        return acc;
-      }, []);
-      
-      const sortedApps = uniqueApps.sort((a, b) => 
-        (a.applicationName || '').localeCompare(b.applicationName || '')
-      );
-      setApplications(sortedApps);
+      // The server returns deduplicated applications already sorted by name
+      const response = await axios.get('http://localhost:5000/api/applications', {
+        params: { q: query || undefined, limit: PAGE_SIZE }
+      });
+      setApplications(response.data.items);
     } catch (error) {
       console.error('Error fetching applications:', error);
     }
@@ -57,9 +55,22 @@ const SupplyChainView = () => {
 
   const fetchSupplyChain = async (appId) => {
     try {
-      const response = await axios.get(`http://localhost:5000/api/applications/${appId}/supply-chain`);
-      if (response.data) {
-        renderSupplyChain(response.data);
+      const cached = supplyChainCache.current.get(appId);
+      const response = await axios.get(`http://localhost:5000/api/applications/${appId}/supply-chain`, {
+        // Node positions are computed (and cached) by the server
+        params: { layout: true },
+        headers: cached ? { 'If-None-Match': cached.etag } : {},
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304
+      });
+
+      let data = response.data;
+      if (response.status === 304 && cached) {
+        data = cached.data;  // Unchanged since the last visit
+      } else if (response.headers.etag) {
+        supplyChainCache.current.set(appId, { etag: response.headers.etag, data });
+      }
+      if (data) {
+        renderSupplyChain(data);
       }
     } catch (error) {
       console.error('Error fetching supply chain:', error);
@@ -68,17 +79,14 @@ const SupplyChainView = () => {
     }
   };
 
-  const handleAppChange = (event) => {
-    const newAppId = event.target.value;
+  const handleAppChange = (event, selectedApplication) => {
+    const newAppId = selectedApplication ? selectedApplication.applicationId : '';
     if (newAppId === selectedApp) return;
     
     setSelectedApp(newAppId);
-    if (newAppId) {
-      const selectedApplication = applications.find(app => app.applicationId === newAppId);
-      if (selectedApplication) {
-        updateNavigationHistory(selectedApplication);
-        fetchSupplyChain(newAppId);
-      }
+    if (selectedApplication) {
+      updateNavigationHistory(selectedApplication);
+      fetchSupplyChain(newAppId);
     } else {
       setNodes([]);
       setEdges([]);
@@ -118,12 +126,9 @@ const SupplyChainView = () => {
 
     try {
       setSelectedApp(node.id);
-      const clickedApp = applications.find(app => app.applicationId === node.id);
-      
-      if (clickedApp) {
-        updateNavigationHistory(clickedApp);
-        await fetchSupplyChain(node.id);
-      }
+      const clickedApp = { applicationId: node.id, applicationName: node.data.name };
+      updateNavigationHistory(clickedApp);
+      await fetchSupplyChain(node.id);
     } catch (error) {
       console.error('Error handling node click:', error);
     }
@@ -132,6 +137,7 @@ const SupplyChainView = () => {
   const renderSupplyChain = (data) => {
     const nodes = [];
     const edges = [];
+    const positions = (data.layout && data.layout.positions) || {};
     
     // Main application node (center)
     if (data.mainApp) {
@@ -144,9 +150,10 @@ const SupplyChainView = () => {
               <div style={{ fontWeight: 'bold', fontSize: '14px' }}>{data.mainApp.applicationName || 'Unknown'}</div>
             </div>
           ),
+          name: data.mainApp.applicationName,
           type: 'main'
         },
-        position: { x: 400, y: 300 },
+        position: positions[data.mainApp.applicationId] || { x: 400, y: 300 },
         style: {
           background: '#2196f3',
           color: 'white',
@@ -183,9 +190,10 @@ const SupplyChainView = () => {
               </div>
             </div>
           ),
+          name: app.applicationName,
           type: 'upstream'
         },
-        position: { x, y },
+        position: positions[app.applicationId] || { x, y },
         style: {
           background: '#4caf50',
           color: 'white',
@@ -235,9 +243,10 @@ const SupplyChainView = () => {
               </div>
             </div>
           ),
+          name: app.applicationName,
           type: 'downstream'
         },
-        position: { x, y },
+        position: positions[app.applicationId] || { x, y },
         style: {
           background: '#ff9800',
           color: 'white',
@@ -270,10 +279,10 @@ const SupplyChainView = () => {
   const handleBreadcrumbClick = (appId) => {
     if (appId === selectedApp) return;
     
-    const app = applications.find(a => a.applicationId === appId);
-    if (app) {
+    const entry = navigationHistory.find(item => item.id === appId);
+    if (entry) {
       setSelectedApp(appId);
-      updateNavigationHistory(app);
+      updateNavigationHistory({ applicationId: entry.id, applicationName: entry.name });
       fetchSupplyChain(appId);
     }
   };
@@ -285,26 +294,27 @@ const SupplyChainView = () => {
           Application Supply Chain
         </Typography>
 
-        <FormControl fullWidth sx={{ mb: 3 }}>
-          <InputLabel>Select Application</InputLabel>
-          <Select
-            value={selectedApp}
-            onChange={handleAppChange}
-            label="Select Application"
-          >
-            <MenuItem value="">
-              <em>None</em>
-            </MenuItem>
-            {applications.map((app) => (
-              <MenuItem 
-                key={app.applicationId} 
-                value={app.applicationId}
-              >
-                {app.applicationName}
-              </MenuItem>
-            ))}
-          </Select>
-        </FormControl>
+        <Autocomplete
+          fullWidth
+          sx={{ mb: 3 }}
+          options={applications}
+          value={currentApp ? { applicationId: currentApp.id, applicationName: currentApp.name } : null}
+          onChange={handleAppChange}
+          onInputChange={(event, value, reason) => {
+            if (reason === 'input') setSearchText(value);
+          }}
+          filterOptions={(options) => options}
+          getOptionLabel={(option) => option.applicationName || ''}
+          isOptionEqualToValue={(option, value) => option.applicationId === value.applicationId}
+          renderOption={(props, option) => (
+            <li {...props} key={option.applicationId}>
+              {option.applicationName}
+            </li>
+          )}
+          renderInput={(params) => (
+            <TextField {...params} label="Select Application" placeholder="Type to search" />
+          )}
+        />
 
         {navigationHistory.length > 0 && (
           <Box sx={{ mb: 2 }}>